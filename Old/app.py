@@ -10,43 +10,96 @@ Date: August 9, 2025
 Version: 3.0.0 - PostgreSQL Database Integration
 """
 
-from flask import Flask, render_template_string, request, redirect, url_for, session, flash, jsonify, send_file, make_response
+from flask import Flask, render_template, render_template_string, request, redirect, url_for, session, flash, jsonify, send_file, make_response, has_app_context
 import os
 from datetime import datetime, timedelta
 import hashlib
+import hmac
+import math
 import secrets
 from functools import wraps, lru_cache
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.pool import QueuePool
 import json
+import re
+import csv
+import io
+import gzip
+import queue
+import atexit
+import click
+import socket
+import threading
+import time
+from collections import OrderedDict
 import redis
+from redis.client import NEVER_DECODE
 from flask_compress import Compress
+try:
+    import brotli
+except ImportError:  # Optional: Flask-Compress normally pulls it in
+    brotli = None
+try:
+    import openpyxl
+except ImportError:  # Optional: only needed for .xlsx ID uploads
+    openpyxl = None
 from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 app = Flask(__name__)
 app.secret_key = 'Huzaifa53'
 
+# Number of reverse proxies (Railway's edge) in front of the app, so
+# request.remote_addr is the client taken from X-Forwarded-For. Set to 0
+# when the app is reached directly.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', '1'))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
 # Enable gzip compression for all responses
 compress = Compress()
 compress.init_app(app)
 
+# Socket.IO message queue so emits reach clients connected to any worker/replica.
+# Set SOCKETIO_MESSAGE_QUEUE to a Redis URL, or to "redis" to reuse REDIS_URL.
+# Leave unset for a single worker (-w 1), where no queue is needed.
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+if SOCKETIO_MESSAGE_QUEUE == 'redis':
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('REDIS_URL')
+
 # Initialize SocketIO with eventlet for production-ready async support
 socketio = SocketIO(
     app,
     cors_allowed_origins="*",
     async_mode='eventlet',
+    message_queue=SOCKETIO_MESSAGE_QUEUE,
+    channel='webinar-relay-socketio',
     logger=False,
     engineio_logger=False,
     ping_timeout=60,
     ping_interval=25
 )
 
+# Client transports, in order of preference. Use "websocket" alone when running
+# several workers/replicas without a sticky load balancer: long-polling needs
+# every request of a client to reach the same process, a websocket does not.
+SOCKETIO_TRANSPORTS = [t.strip() for t in os.environ.get('SOCKETIO_TRANSPORTS', 'websocket,polling').split(',') if t.strip()]
+
+@app.context_processor
+def inject_socketio_settings():
+    """Expose Socket.IO client settings to all templates"""
+    return {'socketio_transports': SOCKETIO_TRANSPORTS}
+
 # Flask performance configurations
 app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/css', 'text/xml', 'application/json', 'application/javascript']
 app.config['COMPRESS_LEVEL'] = 6  # Balance between speed and compression
 app.config['COMPRESS_MIN_SIZE'] = 500  # Only compress responses larger than 500 bytes
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000  # Cache static files for 1 year
+# Largest request body accepted (ID file uploads); bigger requests get a 413
+MAX_UPLOAD_MB = int(os.environ.get('MAX_UPLOAD_MB', '16'))
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
 
 # Database configuration with connection pooling
 DATABASE_URL = os.environ.get('DATABASE_URL')
@@ -102,7 +155,7 @@ class ItsID(db.Model):
 class AdminCredential(db.Model):
     __tablename__ = 'admin_credentials'
     username = db.Column(db.String(50), primary_key=True)
-    password_hash = db.Column(db.String(64), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     
     def __repr__(self):
         return f'<Admin {self.username}>'
@@ -162,13 +215,28 @@ def init_database():
     # Create tables if they don't exist
     db.create_all()
     
+    # Widen password_hash for scrypt hashes on tables created before it held them
+    if db.engine.dialect.name == 'postgresql':
+        try:
+            # ALTER takes an exclusive lock, so only run it while the column is narrow
+            width = db.session.execute(text(
+                "SELECT character_maximum_length FROM information_schema.columns "
+                "WHERE table_name = 'admin_credentials' AND column_name = 'password_hash'"
+            )).scalar()
+            if width is not None and width < 255:
+                db.session.execute(text('ALTER TABLE admin_credentials ALTER COLUMN password_hash TYPE VARCHAR(255)'))
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error widening admin password_hash column: {e}")
+    
     # Check if admin exists, if not create default admin
     admin = AdminCredential.query.filter_by(username=ADMIN_USERNAME).first()
     if not admin:
-        admin_hash = hashlib.sha256(ADMIN_PASSWORD.encode()).hexdigest()
-        admin = AdminCredential(username=ADMIN_USERNAME, password_hash=admin_hash)
+        admin = AdminCredential(username=ADMIN_USERNAME, password_hash=hash_admin_password(ADMIN_PASSWORD))
         db.session.add(admin)
         db.session.commit()
+    load_admin_credentials()
     
     # Check if ITS webinar settings exist, if not create default settings
     settings = WebinarSetting.query.first()
@@ -199,95 +267,608 @@ def init_database():
         )
         db.session.add(default_majlis_settings)
         db.session.commit()
-    
-    # Initialize Redis cache
-    refresh_redis_cache()
+    # The Redis cache is warmed by run_startup_tasks once this has run
 
 # Redis Cache Functions
-def refresh_redis_cache():
-    """Refresh all Redis cache from database"""
+# IDs per SADD/SREM command (and per DB fetch) when rebuilding the ID sets
+CACHE_REFRESH_CHUNK = int(os.environ.get('CACHE_REFRESH_CHUNK', '1000'))
+# 'swap' builds a fresh set and RENAMEs it in; 'diff' only applies SADD/SREM
+CACHE_REFRESH_MODE = os.environ.get('CACHE_REFRESH_MODE', 'swap')
+# Safety TTL on a half-built temporary set if the refreshing process dies
+CACHE_REFRESH_TEMP_TTL = 3600
+# Seconds of allow-list journal before a refresh's start that it replays too
+ALLOWLIST_JOURNAL_SLACK = 30
+
+def _iter_db_id_chunks(model, chunk_size):
+    """Stream IDs of an ID table from the database in chunks"""
+    chunk = []
+    for (id_value,) in db.session.query(model.id).yield_per(chunk_size):
+        chunk.append(id_value)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def swap_id_set(key, model, chunk_size=None):
+    """Rebuild an ID set under a temporary key and RENAME it into place.
+
+    The live set keeps answering SISMEMBER until the atomic swap, so a
+    refresh never opens a window where every login fails validation.
+    """
+    chunk_size = chunk_size or CACHE_REFRESH_CHUNK
+    temp_key = f'{key}:rebuild:{secrets.token_hex(4)}'
+    total = 0
     try:
-        # Cache ITS IDs
-        its_ids = ItsID.query.all()
-        redis_client.delete('cached:its_ids')
-        if its_ids:
-            redis_client.sadd('cached:its_ids', *[its_id.id for its_id in its_ids])
+        for chunk in _iter_db_id_chunks(model, chunk_size):
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.sadd(temp_key, *chunk)
+            pipe.expire(temp_key, CACHE_REFRESH_TEMP_TTL)
+            pipe.execute()
+            total += len(chunk)
         
-        # Cache Majlis IDs
-        majlis_ids = MajlisID.query.all()
-        redis_client.delete('cached:majlis_ids')
-        if majlis_ids:
-            redis_client.sadd('cached:majlis_ids', *[majlis_id.id for majlis_id in majlis_ids])
+        pipe = redis_client.pipeline()
+        if total:
+            # RENAME carries the safety TTL over, so drop it in the same MULTI
+            pipe.rename(temp_key, key)
+            pipe.persist(key)
+        else:
+            pipe.delete(key)
+        pipe.execute()
+    except Exception:
+        redis_client.delete(temp_key)
+        raise
+    return {'mode': 'swap', 'total': total}
+
+def diff_id_set(key, model, chunk_size=None):
+    """Bring an ID set in line with the database using only SADD/SREM"""
+    chunk_size = chunk_size or CACHE_REFRESH_CHUNK
+    db_ids = set()
+    for chunk in _iter_db_id_chunks(model, chunk_size):
+        db_ids.update(chunk)
+    
+    cached_ids = set(redis_client.sscan_iter(key, count=chunk_size))
+    to_add = list(db_ids - cached_ids)
+    to_remove = list(cached_ids - db_ids)
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for i in range(0, len(to_add), chunk_size):
+        pipe.sadd(key, *to_add[i:i + chunk_size])
+    for i in range(0, len(to_remove), chunk_size):
+        pipe.srem(key, *to_remove[i:i + chunk_size])
+    pipe.execute()
+    return {'mode': 'diff', 'total': len(db_ids), 'added': len(to_add), 'removed': len(to_remove)}
+
+def refresh_id_sets(mode=None, chunk_size=None):
+    """Refresh both cached ID sets; returns per-type refresh stats"""
+    started = time.time()
+    if ALLOWLIST_BACKEND == 'bitmap':
+        # Bitmaps are cheap to rebuild, so there is no separate diff mode
+        stats = {
+            'its': swap_id_bitmap('its', ItsID, chunk_size),
+            'majlis': swap_id_bitmap('majlis', MajlisID, chunk_size)
+        }
+    else:
+        mode = mode or CACHE_REFRESH_MODE
+        refresh = diff_id_set if mode == 'diff' else swap_id_set
+        stats = {
+            'its': refresh(ALLOWLIST_KEYS['its'], ItsID, chunk_size),
+            'majlis': refresh(ALLOWLIST_KEYS['majlis'], MajlisID, chunk_size)
+        }
+    # Changes committed after the database was read would otherwise be
+    # overwritten by the swap (or SREMed again by diff)
+    for user_type, user_stats in stats.items():
+        user_stats['replayed'] = replay_allowlist_journal(user_type, started)
+    publish_allowlist_filter_update('rebuild')
+    return stats
+
+def refresh_redis_cache(mode=None):
+    """Refresh all Redis cache from database; returns True on success"""
+    try:
+        # Cache ITS and Majlis IDs
+        refresh_id_sets(mode)
         
         # Cache ITS webinar settings
         its_settings = WebinarSetting.query.first()
         if its_settings:
-            settings_dict = {
-                "embed_url": its_settings.embed_url,
-                "youtube_video_id": its_settings.youtube_video_id,
-                "webinar_title": its_settings.webinar_title,
-                "webinar_description": its_settings.webinar_description,
-                "webinar_date": its_settings.webinar_date,
-                "webinar_time": its_settings.webinar_time,
-                "webinar_speaker": its_settings.webinar_speaker,
-                "start_time": its_settings.start_time.isoformat() if its_settings.start_time else None,
-                "end_time": its_settings.end_time.isoformat() if its_settings.end_time else None,
-                "no_webinar": its_settings.no_webinar
-            }
-            redis_client.set('cached:webinar_settings', json.dumps(settings_dict))
+            store_cached_settings('its', settings_to_dict(its_settings))
         
         # Cache Majlis webinar settings
         majlis_settings = MajlisWebinarSetting.query.first()
         if majlis_settings:
-            majlis_settings_dict = {
-                "embed_url": majlis_settings.embed_url,
-                "youtube_video_id": majlis_settings.youtube_video_id,
-                "webinar_title": majlis_settings.webinar_title,
-                "webinar_description": majlis_settings.webinar_description,
-                "webinar_date": majlis_settings.webinar_date,
-                "webinar_time": majlis_settings.webinar_time,
-                "webinar_speaker": majlis_settings.webinar_speaker,
-                "start_time": majlis_settings.start_time.isoformat() if majlis_settings.start_time else None,
-                "end_time": majlis_settings.end_time.isoformat() if majlis_settings.end_time else None,
-                "no_webinar": majlis_settings.no_webinar
-            }
-            redis_client.set('cached:majlis_settings', json.dumps(majlis_settings_dict))
-            
+            store_cached_settings('majlis', settings_to_dict(majlis_settings))
+        
+        # Lets restarting workers reuse the cache instead of reloading it
+        redis_client.set(CACHE_WARM_KEY, json.dumps({'backend': ALLOWLIST_BACKEND, 'at': datetime.now().isoformat()}))
         print("Redis cache refreshed successfully")
+        return True
     except Exception as e:
         print(f"Error refreshing Redis cache: {e}")
-
-def is_its_id_valid(its_id):
-    """Check if ITS ID is valid using Redis cache"""
-    try:
-        return redis_client.sismember('cached:its_ids', its_id)
-    except Exception as e:
-        print(f"Error checking ITS ID: {e}")
         return False
 
-def is_majlis_id_valid(majlis_id):
-    """Check if Majlis ID is valid using Redis cache"""
+# ID allow-list storage
+ALLOWLIST_KEYS = {
+    'its': 'cached:its_ids',
+    'majlis': 'cached:majlis_ids'
+}
+# 'set' keeps IDs as Redis set members (roughly 60-80 bytes each); 'bitmap'
+# keeps one bit per numeric ID in sharded bitmaps (at most 12.5 MB per type)
+ALLOWLIST_BACKEND = os.environ.get('ALLOWLIST_BACKEND', 'set')
+# Bits per bitmap shard; like roaring containers, a shard is only allocated
+# once an ID falls into its 2^16 range, so clustered ID ranges stay small
+ALLOWLIST_SHARD_BITS = 1 << 16
+
+def _bitmap_shard_prefix(user_type):
+    return f'{ALLOWLIST_KEYS[user_type]}:bits'
+
+def _bitmap_count_key(user_type):
+    """Bitmaps have no SCARD, so the ID count is kept alongside them"""
+    return f'{ALLOWLIST_KEYS[user_type]}:bits:count'
+
+def _bit_location(user_type, user_id):
+    """(shard key, bit offset) of a numeric ID in the bitmap backend"""
+    number = int(user_id)
+    return (f'{_bitmap_shard_prefix(user_type)}:{number // ALLOWLIST_SHARD_BITS}',
+            number % ALLOWLIST_SHARD_BITS)
+
+def allowlist_location(user_type, user_id):
+    """(key, bit offset) to test membership; the offset is '' for sets"""
+    if ALLOWLIST_BACKEND == 'bitmap':
+        return _bit_location(user_type, user_id)
+    return ALLOWLIST_KEYS[user_type], ''
+
+def check_allowlists(user_id, user_types=None):
+    """Return {user_type: bool} for one ID with a single pipelined round trip"""
+    user_types = user_types or USER_TYPES
+    user_id = str(user_id)
+    if not user_id.isdigit():
+        return {user_type: False for user_type in user_types}
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for user_type in user_types:
+        if ALLOWLIST_BACKEND == 'bitmap':
+            pipe.getbit(*_bit_location(user_type, user_id))
+        else:
+            pipe.sismember(ALLOWLIST_KEYS[user_type], user_id)
+    return {user_type: bool(found) for user_type, found in zip(user_types, pipe.execute())}
+
+# Every add/remove/clear is also journalled with its time, so a refresh that
+# read the database before the change can replay it after its swap instead of
+# silently undoing it
+def _allowlist_journal_key(user_type):
+    return f'{ALLOWLIST_KEYS[user_type]}:journal'
+
+def _journal_allowlist_change(pipe, user_type, op, ids=('',)):
+    """Queue journal entries ('add'/'remove'/'clear') on a pipeline"""
+    key = _allowlist_journal_key(user_type)
+    now = time.time()
+    pipe.zadd(key, {f'{op}:{id_value}': now for id_value in ids})
+    pipe.zremrangebyscore(key, '-inf', now - CACHE_REFRESH_TEMP_TTL)
+    pipe.expire(key, CACHE_REFRESH_TEMP_TTL)
+
+def _apply_allowlist_change(user_type, ids, present, journal=True):
+    """Set or unset IDs in the cached allow-list; returns how many changed"""
+    pipe = redis_client.pipeline(transaction=False)
+    if ALLOWLIST_BACKEND != 'bitmap':
+        if present:
+            pipe.sadd(ALLOWLIST_KEYS[user_type], *ids)
+        else:
+            pipe.srem(ALLOWLIST_KEYS[user_type], *ids)
+    else:
+        for id_value in ids:
+            pipe.setbit(*_bit_location(user_type, id_value), 1 if present else 0)
+    if journal:
+        _journal_allowlist_change(pipe, user_type, 'add' if present else 'remove', ids)
+    results = pipe.execute()
+    
+    if ALLOWLIST_BACKEND != 'bitmap':
+        return results[0]
+    changed = sum(1 for previous in results[:len(ids)] if bool(previous) != present)
+    if changed:
+        redis_client.incrby(_bitmap_count_key(user_type), changed if present else -changed)
+    return changed
+
+def allowlist_add(user_type, ids):
+    """Add IDs to the cached allow-list; returns how many were new"""
+    if not ids:
+        return 0
+    added = _apply_allowlist_change(user_type, ids, True)
+    publish_allowlist_filter_update('add', ids)
+    return added
+
+def allowlist_remove(user_type, ids):
+    """Remove IDs from the cached allow-list; returns how many were present"""
+    if not ids:
+        return 0
+    removed = _apply_allowlist_change(user_type, ids, False)
+    # Bloom filters cannot delete; the stale bits only cost a Redis check
+    allowlist_filter.note_deleted(removed)
+    return removed
+
+def _bitmap_shard_keys(user_type):
+    """Live shard keys of a bitmap allow-list (temporary rebuild keys excluded)"""
+    return [key for keys in _scan_key_batches(f'{_bitmap_shard_prefix(user_type)}:[0-9]*') for key in keys]
+
+def allowlist_clear(user_type, journal=True):
+    """Drop the cached allow-list in whichever representation it is stored"""
+    pipe = redis_client.pipeline()
+    pipe.delete(ALLOWLIST_KEYS[user_type], _bitmap_count_key(user_type))
+    # Finding shards takes a SCAN of the whole keyspace; the set backend has none
+    shard_keys = _bitmap_shard_keys(user_type) if ALLOWLIST_BACKEND == 'bitmap' else []
+    if shard_keys:
+        pipe.delete(*shard_keys)
+    if journal:
+        _journal_allowlist_change(pipe, user_type, 'clear')
+    pipe.execute()
+
+def replay_allowlist_journal(user_type, since):
+    """Re-apply allow-list changes journalled since a refresh started.
+
+    Entries from shortly before the refresh (allowing for clock skew between
+    workers) are replayed too; they already match the database, so applying
+    them again is harmless. Returns the number of IDs replayed.
+    """
+    entries = redis_client.zrangebyscore(_allowlist_journal_key(user_type),
+                                         since - ALLOWLIST_JOURNAL_SLACK, '+inf')
+    latest = {}
+    cleared = False
+    for entry in entries:
+        op, _, id_value = entry.partition(':')
+        if op == 'clear':
+            # Only changes after the last clear survive it
+            latest.clear()
+            cleared = True
+        else:
+            latest[id_value] = op == 'add'
+    
+    # Replayed writes are not journalled again, which would reorder them
+    # against changes made after this read
+    if cleared:
+        allowlist_clear(user_type, journal=False)
+    added = [id_value for id_value, present in latest.items() if present]
+    removed = [id_value for id_value, present in latest.items() if not present]
+    if added:
+        _apply_allowlist_change(user_type, added, True, journal=False)
+    if removed:
+        _apply_allowlist_change(user_type, removed, False, journal=False)
+    return len(latest)
+
+def swap_id_bitmap(user_type, model, chunk_size=None):
+    """Rebuild a bitmap allow-list under temporary shard keys and swap them in.
+
+    All RENAMEs, the removal of shards that no longer hold any ID and the
+    new count go out in one MULTI, so checks see either the old or the new
+    bitmap. The set representation is dropped in the same step.
+    """
+    chunk_size = chunk_size or CACHE_REFRESH_CHUNK
+    prefix = _bitmap_shard_prefix(user_type)
+    temp_prefix = f'{prefix}:rebuild:{secrets.token_hex(4)}'
+    shards = set()
+    total = 0
     try:
-        return redis_client.sismember('cached:majlis_ids', majlis_id)
-    except Exception as e:
-        print(f"Error checking Majlis ID: {e}")
+        for chunk in _iter_db_id_chunks(model, chunk_size):
+            pipe = redis_client.pipeline(transaction=False)
+            for id_value in chunk:
+                if not id_value.isdigit():
+                    continue
+                number = int(id_value)
+                shard = number // ALLOWLIST_SHARD_BITS
+                pipe.setbit(f'{temp_prefix}:{shard}', number % ALLOWLIST_SHARD_BITS, 1)
+                if shard not in shards:
+                    shards.add(shard)
+                    pipe.expire(f'{temp_prefix}:{shard}', CACHE_REFRESH_TEMP_TTL)
+                total += 1
+            pipe.execute()
+        
+        live_keys = {f'{prefix}:{shard}' for shard in shards}
+        stale_keys = set(_bitmap_shard_keys(user_type)) - live_keys
+        pipe = redis_client.pipeline()
+        for shard in shards:
+            pipe.rename(f'{temp_prefix}:{shard}', f'{prefix}:{shard}')
+            pipe.persist(f'{prefix}:{shard}')
+        if stale_keys:
+            pipe.delete(*stale_keys)
+        pipe.delete(ALLOWLIST_KEYS[user_type])
+        pipe.set(_bitmap_count_key(user_type), total)
+        pipe.execute()
+    except Exception:
+        redis_client.delete(*[f'{temp_prefix}:{shard}' for shard in shards] or [temp_prefix])
+        raise
+    return {'mode': 'bitmap', 'total': total, 'shards': len(shards)}
+
+# In-process allow-list Bloom filter
+ALLOWLIST_FILTER_ENABLED = os.environ.get('ALLOWLIST_FILTER_ENABLED', 'true').lower() == 'true'
+ALLOWLIST_FILTER_FP_RATE = float(os.environ.get('ALLOWLIST_FILTER_FP_RATE', '0.01'))
+# Seconds before a worker rebuilds its filter to shed deleted IDs
+ALLOWLIST_FILTER_MAX_AGE = int(os.environ.get('ALLOWLIST_FILTER_MAX_AGE', '3600'))
+ALLOWLIST_FILTER_CHANNEL = 'allowlist_filter'
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (no deletes)"""
+    
+    def __init__(self, capacity, fp_rate):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(int(-self.capacity * math.log(fp_rate) / math.log(2) ** 2), 64)
+        self.hash_count = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.items = 0
+    
+    def _positions(self, key):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+    
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+    
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+    
+    def estimated_fp_rate(self):
+        """False-positive rate implied by the current fill of the bit array"""
+        fill = int.from_bytes(self.bits, 'little').bit_count() / self.size
+        return fill ** self.hash_count
+
+class AllowlistFilter:
+    """Per-worker Bloom filter over the union of the ITS and Majlis allow-lists.
+
+    A miss is a definite "not authorized" answered without Redis; a hit
+    still goes to Redis. Adds from any worker arrive over pub/sub, while
+    deletes just leave harmless false positives until the next rebuild.
+    Updates that land while a rebuild is reading the allow-lists are
+    replayed onto the new filter, so it never misses an added ID.
+    """
+    
+    def __init__(self, fp_rate, max_age):
+        self.fp_rate = fp_rate
+        self.max_age = max_age
+        self._filter = None
+        self._built_at = 0
+        self._building = False
+        self._rebuild_again = False
+        self._pending = []
+        self._lock = threading.Lock()
+        self.deleted = 0
+        self.rejected = 0
+        self.passed = 0
+        self.false_positives = 0
+    
+    def might_contain(self, user_id):
+        """False if the ID is definitely not allowed, None while unavailable"""
+        current = self._filter
+        if current is None:
+            return None
+        if not self._building and time.monotonic() - self._built_at > self.max_age:
+            self.schedule_rebuild()
+        if allowlist_filter_key(user_id) in current:
+            self.passed += 1
+            return True
+        self.rejected += 1
         return False
-
-def load_its_ids():
-    """Load ITS IDs from Redis cache"""
+    
+    def record_false_positive(self):
+        self.false_positives += 1
+    
+    def add(self, ids):
+        ids = [allowlist_filter_key(id_value) for id_value in ids]
+        with self._lock:
+            current = self._filter
+            if current is not None:
+                for id_value in ids:
+                    current.add(id_value)
+            if self._building:
+                self._pending.extend(ids)
+        # Sized for the lists at build time; past that the FP rate climbs fast
+        if current is not None and current.items > current.capacity and not self._building:
+            self.schedule_rebuild()
+    
+    def note_deleted(self, count):
+        self.deleted += count
+    
+    def schedule_rebuild(self):
+        """Rebuild in a background thread, or once more after the running one"""
+        with self._lock:
+            if self._building:
+                # The running rebuild may have read the allow-lists too early
+                self._rebuild_again = True
+                return
+            self._building = True
+            self._pending = []
+        threading.Thread(target=self._rebuild, daemon=True).start()
+    
+    def _rebuild(self):
+        while True:
+            self._rebuild_once()
+            with self._lock:
+                if not self._rebuild_again:
+                    self._building = False
+                    self._pending = []
+                    return
+                self._rebuild_again = False
+                self._pending = []
+    
+    def _rebuild_once(self):
+        try:
+            expected = sum(get_id_counts().values())
+            new_filter = BloomFilter(expected * 1.25 + 1000, self.fp_rate)
+            for user_type in USER_TYPES:
+                for id_value in iter_allowlist_ids(user_type):
+                    new_filter.add(id_value)
+            with self._lock:
+                for id_value in self._pending:
+                    new_filter.add(id_value)
+                self._filter = new_filter
+                self._built_at = time.monotonic()
+                self.deleted = 0
+            print(f"Allow-list filter rebuilt with {new_filter.items} IDs")
+        except Exception as e:
+            print(f"Error rebuilding allow-list filter: {e}")
+    
+    def stats(self):
+        current = self._filter
+        checked_negatives = self.rejected + self.false_positives
+        stats = {
+            'enabled': ALLOWLIST_FILTER_ENABLED,
+            'ready': current is not None,
+            'target_fp_rate': self.fp_rate,
+            'rejected_locally': self.rejected,
+            'passed_to_redis': self.passed,
+            'false_positives': self.false_positives,
+            'observed_fp_rate': round(self.false_positives / checked_negatives, 6) if checked_negatives else 0,
+            'deleted_since_build': self.deleted
+        }
+        if current is not None:
+            stats.update({
+                'items': current.items,
+                'capacity': current.capacity,
+                'bits': current.size,
+                'hash_functions': current.hash_count,
+                'memory_bytes': len(current.bits),
+                'estimated_fp_rate': round(current.estimated_fp_rate(), 6),
+                'age_seconds': round(time.monotonic() - self._built_at)
+            })
+        return stats
+
+allowlist_filter = AllowlistFilter(ALLOWLIST_FILTER_FP_RATE, ALLOWLIST_FILTER_MAX_AGE)
+
+# Bitmap shards fetched per pipeline when reading IDs back (8 KB each)
+ALLOWLIST_BITMAP_READ_BATCH = 16
+
+def allowlist_filter_key(user_id):
+    """Bitmaps keep IDs as numbers, so the filter drops leading zeros to match"""
+    if ALLOWLIST_BACKEND == 'bitmap' and user_id.isdigit():
+        return str(int(user_id))
+    return user_id
+
+def iter_bitmap_ids(user_type):
+    """Iterate the IDs set in a bitmap allow-list by walking its shards"""
+    shard_keys = _bitmap_shard_keys(user_type)
+    for i in range(0, len(shard_keys), ALLOWLIST_BITMAP_READ_BATCH):
+        batch = shard_keys[i:i + ALLOWLIST_BITMAP_READ_BATCH]
+        pipe = redis_client.pipeline(transaction=False)
+        for key in batch:
+            # Raw bytes; the shared client would try to decode them as UTF-8
+            pipe.execute_command('GET', key, **{NEVER_DECODE: []})
+        for key, bits in zip(batch, pipe.execute()):
+            if not bits:
+                continue
+            base = int(key.rsplit(':', 1)[1]) * ALLOWLIST_SHARD_BITS
+            for byte_index, byte in enumerate(bits):
+                if not byte:
+                    continue
+                # SETBIT offset 0 is the most significant bit of the first byte
+                for bit in range(8):
+                    if byte & (0x80 >> bit):
+                        yield str(base + byte_index * 8 + bit)
+
+def iter_allowlist_ids(user_type):
+    """Iterate every cached ID of a type from Redis"""
+    if ALLOWLIST_BACKEND == 'bitmap':
+        yield from iter_bitmap_ids(user_type)
+        return
+    yield from redis_client.sscan_iter(ALLOWLIST_KEYS[user_type], count=CACHE_REFRESH_CHUNK)
+
+def _apply_allowlist_filter_message(message):
+    """Apply an allow-list change published by any worker to the local filter"""
+    if not ALLOWLIST_FILTER_ENABLED:
+        return
+    if message.get('origin') == INSTANCE_ID:
+        return  # Already applied when it was published
+    if message.get('op') == 'add':
+        allowlist_filter.add(message.get('ids', []))
+    elif message.get('op') == 'rebuild':
+        allowlist_filter.schedule_rebuild()
+
+def publish_allowlist_filter_update(op, ids=None):
+    """Tell every worker's filter about added IDs or a full refresh"""
+    if not ALLOWLIST_FILTER_ENABLED:
+        return
+    message = {'op': op}
+    if ids:
+        message['ids'] = list(ids)
+    # Apply locally right away so the admin's own worker never lags; the
+    # origin tag then makes this worker skip the echo from pub/sub
+    _apply_allowlist_filter_message(message)
+    message['origin'] = INSTANCE_ID
     try:
-        return set(redis_client.smembers('cached:its_ids'))
+        redis_client.publish(ALLOWLIST_FILTER_CHANNEL, json.dumps(message))
     except Exception as e:
-        print(f"Error loading ITS IDs from cache: {e}")
-        return set()
+        print(f"Error publishing allow-list filter update: {e}")
+
+def resolve_user_roles(user_id):
+    """Return the user types an ID is allowed as, e.g. ('its', 'majlis').
 
-def load_majlis_ids():
-    """Load Majlis IDs from Redis cache"""
+    IDs the local Bloom filter has never seen are rejected without touching
+    Redis; otherwise both allow-lists are checked in one pipelined round
+    trip, which is all the login form needs to choose between role
+    selection and a direct login.
+    """
+    user_id = str(user_id)
+    verdict = allowlist_filter.might_contain(user_id) if ALLOWLIST_FILTER_ENABLED else None
+    if verdict is False:
+        return ()
+    
     try:
-        return set(redis_client.smembers('cached:majlis_ids'))
+        found = check_allowlists(user_id)
+        roles = tuple(user_type for user_type in USER_TYPES if found[user_type])
     except Exception as e:
-        print(f"Error loading Majlis IDs from cache: {e}")
-        return set()
+        print(f"Error resolving roles for ID {user_id}: {e}")
+        return ()
+    if verdict and not roles:
+        allowlist_filter.record_false_positive()
+    return roles
+
+# Admin listing pages
+ADMIN_PAGE_SIZE = 100
+ADMIN_PAGE_MAX = 500
+# SSCAN/SCAN calls one listing request may spend looking for matches
+ADMIN_PAGE_MAX_ROUNDS = 10
+
+def get_id_counts():
+    """Number of cached ITS and Majlis IDs"""
+    pipe = redis_client.pipeline(transaction=False)
+    for user_type in USER_TYPES:
+        if ALLOWLIST_BACKEND == 'bitmap':
+            pipe.get(_bitmap_count_key(user_type))
+        else:
+            pipe.scard(ALLOWLIST_KEYS[user_type])
+    return {user_type: int(count or 0) for user_type, count in zip(USER_TYPES, pipe.execute())}
+
+def _db_id_page(user_type, cursor, prefix, limit):
+    """Keyset-paginate IDs from the database (bitmaps cannot be listed)"""
+    model = ID_MODELS[user_type]
+    query = db.session.query(model.id).filter(model.id >= f'{cursor:08d}')
+    if prefix:
+        query = query.filter(model.id.like(f'{prefix}%'))
+    ids = [id_value for (id_value,) in query.order_by(model.id).limit(limit)]
+    next_cursor = int(ids[-1]) + 1 if len(ids) == limit and ids[-1].isdigit() else None
+    return ids, next_cursor
+
+def scan_id_page(user_type, cursor=0, prefix='', limit=ADMIN_PAGE_SIZE):
+    """Return (ids, next_cursor) for one page of a cached ID set.
+
+    Walks the set with SSCAN MATCH prefix* so a page never loads the whole
+    set. next_cursor is None once the scan has wrapped around.
+    """
+    if len(prefix) == 8:
+        # Full ID: a single membership check beats scanning for it
+        return ([prefix] if check_allowlists(prefix, (user_type,))[user_type] else []), None
+    if ALLOWLIST_BACKEND == 'bitmap':
+        return _db_id_page(user_type, cursor, prefix, limit)
+    
+    key = ALLOWLIST_KEYS[user_type]
+    match = f'{prefix}*' if prefix else None
+    ids = []
+    for _ in range(ADMIN_PAGE_MAX_ROUNDS):
+        cursor, members = redis_client.sscan(key, cursor, match=match, count=max(limit, ADMIN_PAGE_SIZE))
+        ids.extend(members)
+        if cursor == 0 or len(ids) >= limit:
+            break
+    return sorted(ids), (cursor or None)
 
 def save_its_id(its_id):
     """Save a new ITS ID to database and update Redis cache"""
@@ -299,7 +880,7 @@ def save_its_id(its_id):
             db.session.add(new_id)
             db.session.commit()
             # Update Redis cache
-            redis_client.sadd('cached:its_ids', its_id)
+            allowlist_add('its', [its_id])
         return True
     except Exception as e:
         print(f"Error saving ITS ID: {e}")
@@ -316,7 +897,7 @@ def save_majlis_id(majlis_id):
             db.session.add(new_id)
             db.session.commit()
             # Update Redis cache
-            redis_client.sadd('cached:majlis_ids', majlis_id)
+            allowlist_add('majlis', [majlis_id])
         return True
     except Exception as e:
         print(f"Error saving Majlis ID: {e}")
@@ -331,7 +912,7 @@ def delete_its_id(its_id):
             db.session.delete(existing)
             db.session.commit()
             # Update Redis cache
-            redis_client.srem('cached:its_ids', its_id)
+            allowlist_remove('its', [its_id])
         return True
     except Exception as e:
         print(f"Error deleting ITS ID: {e}")
@@ -346,44 +927,375 @@ def delete_majlis_id(majlis_id):
             db.session.delete(existing)
             db.session.commit()
             # Update Redis cache
-            redis_client.srem('cached:majlis_ids', majlis_id)
+            allowlist_remove('majlis', [majlis_id])
         return True
     except Exception as e:
         print(f"Error deleting Majlis ID: {e}")
         db.session.rollback()
         return False
 
+# Bulk ID Import
+ID_MODELS = {'its': ItsID, 'majlis': MajlisID}
+# IDs per INSERT ... ON CONFLICT DO NOTHING statement and per SADD
+BULK_IMPORT_CHUNK = int(os.environ.get('BULK_IMPORT_CHUNK', '2000'))
+ID_SEPARATORS = re.compile(r'[,\s]+')
+
+def is_valid_user_id(value):
+    """IDs are exactly 8 digits"""
+    return len(value) == 8 and value.isdigit()
+
+def iter_id_tokens(lines):
+    """Split lines of comma/whitespace separated IDs into stripped tokens"""
+    for line in lines:
+        for token in ID_SEPARATORS.split(line):
+            if token:
+                yield token
+
+def bulk_import_ids(user_type, tokens, chunk_size=None):
+    """Import IDs in chunks with INSERT ... ON CONFLICT DO NOTHING.
+
+    Each chunk is committed on its own and the rows Postgres actually
+    inserted are mirrored into the cached allow-list, so a failure
+    part-way through leaves the DB and Redis agreeing on what got in.
+    Returns accepted / duplicate / invalid counts.
+    """
+    chunk_size = chunk_size or BULK_IMPORT_CHUNK
+    model = ID_MODELS[user_type]
+    counts = {'accepted': 0, 'duplicate': 0, 'invalid': 0}
+    seen = set()
+    chunk = []
+    
+    def flush(chunk):
+        stmt = pg_insert(model.__table__).values([{'id': id_value} for id_value in chunk])
+        stmt = stmt.on_conflict_do_nothing(index_elements=['id']).returning(model.__table__.c.id)
+        accepted = [row[0] for row in db.session.execute(stmt)]
+        db.session.commit()
+        
+        allowlist_add(user_type, accepted)
+        counts['accepted'] += len(accepted)
+        counts['duplicate'] += len(chunk) - len(accepted)
+    
+    try:
+        for token in tokens:
+            if not is_valid_user_id(token):
+                counts['invalid'] += 1
+            elif token in seen:
+                counts['duplicate'] += 1
+            else:
+                seen.add(token)
+                chunk.append(token)
+                if len(chunk) >= chunk_size:
+                    flush(chunk)
+                    chunk = []
+        if chunk:
+            flush(chunk)
+    except Exception:
+        db.session.rollback()
+        raise
+    return counts
+
+def iter_uploaded_id_tokens(upload):
+    """Yield ID tokens from an uploaded CSV, text or XLSX file row by row.
+
+    Werkzeug spools large uploads to a temporary file, and rows are read
+    straight from that stream, so memory stays bounded by one row (plus the
+    current insert chunk) rather than the whole file.
+    """
+    filename = (upload.filename or '').lower()
+    if filename.endswith('.xlsx'):
+        if openpyxl is None:
+            raise ValueError('XLSX uploads need openpyxl installed; upload a CSV instead')
+        workbook = openpyxl.load_workbook(upload.stream, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                for cell in row:
+                    if cell is None:
+                        continue
+                    # Numeric cells come back as int/float
+                    value = str(int(cell)) if isinstance(cell, (int, float)) else str(cell)
+                    yield from iter_id_tokens([value])
+        finally:
+            workbook.close()
+        return
+    
+    text = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+    if filename.endswith('.csv'):
+        # One ID per cell; other columns (names, headers) count as invalid
+        for row in csv.reader(text):
+            for cell in row:
+                cell = cell.strip()
+                if cell:
+                    yield cell
+    else:
+        yield from iter_id_tokens(text)
+
+def describe_import(label, counts):
+    """Admin message summarising a bulk import"""
+    message = f"Added {counts['accepted']} {label} IDs successfully"
+    if counts['duplicate']:
+        message += f", {counts['duplicate']} already present"
+    if counts['invalid']:
+        message += f", {counts['invalid']} invalid"
+    return message
+
 # Redis Session Management Functions
-def create_session(user_id, user_type='its'):
-    """Create a new session in Redis with 24h TTL"""
-    session_token = secrets.token_urlsafe(32)
-    now = datetime.now()
+SESSION_TTL = 86400  # 24 hours
+# Minimum seconds between last_activity writes for the same session
+SESSION_TOUCH_INTERVAL = int(os.environ.get('SESSION_TOUCH_INTERVAL', '300'))
+# Keys per SCAN call / pipelined fetch when walking all sessions
+SESSION_SCAN_BATCH = int(os.environ.get('SESSION_SCAN_BATCH', '500'))
+# Seconds between full recounts correcting drift in the live session counters
+SESSION_RECONCILE_INTERVAL = int(os.environ.get('SESSION_RECONCILE_INTERVAL', '600'))
+SESSION_EXPIRY_SWEEP_INTERVAL = 60  # seconds
+
+USER_TYPES = ('its', 'majlis')
+
+# In-process verified-session cache (per worker)
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', '5'))  # seconds
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', '10000'))
+SESSION_INVALIDATION_CHANNEL = 'session_invalidation'
+
+class SessionCache:
+    """Bounded LRU mapping session token to verified session info.
+
+    Entries live for a few seconds only; kicks and logouts in any worker
+    are pushed to every worker over Redis pub/sub and evict entries early.
+    """
+    
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
     
+    def get(self, session_token):
+        with self._lock:
+            entry = self._entries.get(session_token)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(session_token)
+                self.hits += 1
+                return dict(entry[1])
+            if entry:
+                del self._entries[session_token]
+            self.misses += 1
+            return None
+    
+    def put(self, session_token, session_info):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[session_token] = (time.monotonic() + self.ttl, dict(session_info))
+            self._entries.move_to_end(session_token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, session_token):
+        with self._lock:
+            if self._entries.pop(session_token, None):
+                self.invalidations += 1
+    
+    def invalidate_user(self, user_id, user_type):
+        with self._lock:
+            tokens = [token for token, (_, info) in self._entries.items()
+                      if info.get('user_id') == str(user_id) and info.get('user_type') == user_type]
+            for token in tokens:
+                del self._entries[token]
+            self.invalidations += len(tokens)
+    
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+session_cache = SessionCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+
+def _apply_session_invalidation(message):
+    """Evict cache entries described by an invalidation message"""
+    scope = message.get('scope')
+    if scope == 'token':
+        session_cache.invalidate(message.get('session_token'))
+    elif scope == 'user':
+        session_cache.invalidate_user(message.get('user_id'), message.get('user_type'))
+    elif scope == 'all':
+        session_cache.clear()
+
+def publish_session_invalidation(scope, **fields):
+    """Evict locally and tell every other worker to do the same"""
+    message = dict(fields, scope=scope)
+    _apply_session_invalidation(message)
     try:
-        session_data = {
-            'user_type': user_type,
-            'user_id': str(user_id),
-            'login_time': now.isoformat(),
-            'last_activity': now.isoformat()
-        }
-        # Store session with 24 hour TTL (86400 seconds)
-        redis_client.setex(f'sessions:{session_token}', 86400, json.dumps(session_data))
-        return session_token
+        redis_client.publish(SESSION_INVALIDATION_CHANNEL, json.dumps(message))
     except Exception as e:
-        print(f"Error creating session: {e}")
+        print(f"Error publishing session invalidation: {e}")
+
+# Redis pub/sub channel -> handler, for messages every worker must act on
+WORKER_MESSAGE_HANDLERS = {
+    SESSION_INVALIDATION_CHANNEL: _apply_session_invalidation,
+    ALLOWLIST_FILTER_CHANNEL: _apply_allowlist_filter_message
+}
+
+def listen_for_worker_messages():
+    """Background listener dispatching pub/sub messages published by any worker"""
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(*WORKER_MESSAGE_HANDLERS)
+            # Invalidations and filter adds may have been missed while (re)connecting
+            session_cache.clear()
+            _apply_allowlist_filter_message({'op': 'rebuild'})
+            for message in pubsub.listen():
+                try:
+                    WORKER_MESSAGE_HANDLERS[message['channel']](json.loads(message['data']))
+                except Exception as e:
+                    print(f"Error handling message on {message['channel']}: {e}")
+        except Exception as e:
+            print(f"Error in worker message listener: {e}")
+            session_cache.clear()
+            time.sleep(1)
+
+def _session_key(session_token):
+    """Redis key holding a single session"""
+    return f'sessions:{session_token}'
+
+def _user_sessions_key(user_id, user_type):
+    """Redis key of the per-user reverse index (set of session tokens)"""
+    return f'user_sessions:{user_type}:{user_id}'
+
+# Sorted set of '{user_type}:{user_id}' members scored by last activity (epoch seconds)
+USER_ACTIVITY_KEY = 'user_activity'
+
+def _activity_member(user_id, user_type):
+    """Member name of a user in the activity sorted set"""
+    return f'{user_type}:{user_id}'
+
+def _session_counter_key(user_type):
+    """Redis key of the live session counter for a user type"""
+    return f'stats:active_sessions:{user_type}'
+
+def _session_expiry_key(user_type):
+    """Redis key of the sorted set of session tokens scored by expiry time"""
+    return f'session_expiry:{user_type}'
+
+# KEYS: session key, user session index, expiry index, live counter
+# ARGV: session token
+# The expiry index entry decides whether the session was still counted,
+# so ending the same session twice (or after expiry) never double-decrements.
+END_SESSION_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[2], ARGV[1])
+if redis.call('ZREM', KEYS[3], ARGV[1]) == 1 then
+    redis.call('DECR', KEYS[4])
+end
+return 1
+"""
+end_session_script = redis_client.register_script(END_SESSION_SCRIPT)
+
+# KEYS: expiry index, live counter
+# ARGV: now (epoch seconds), max tokens to process
+EXPIRE_SESSIONS_SCRIPT = """
+local expired = 0
+for _, token in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])) do
+    local ttl = redis.call('TTL', 'sessions:' .. token)
+    if ttl > 0 then
+        redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + ttl, token)
+    else
+        redis.call('ZREM', KEYS[1], token)
+        expired = expired + 1
+    end
+end
+if expired > 0 then
+    redis.call('DECRBY', KEYS[2], expired)
+end
+return expired
+"""
+expire_sessions_script = redis_client.register_script(EXPIRE_SESSIONS_SCRIPT)
+
+def _end_session(session_token, session_info, client=None):
+    """Delete a session and drop it from the user index, expiry index and counter"""
+    user_type = session_info.get('user_type')
+    end_session_script(
+        keys=[_session_key(session_token),
+              _user_sessions_key(session_info.get('user_id'), user_type),
+              _session_expiry_key(user_type),
+              _session_counter_key(user_type)],
+        args=[session_token],
+        client=client
+    )
+
+def _migrate_legacy_session(session_key):
+    """Convert a legacy JSON-string session to the hash layout, keeping its TTL"""
+    pipe = redis_client.pipeline()
+    pipe.get(session_key)
+    pipe.ttl(session_key)
+    try:
+        session_data, ttl = pipe.execute()
+    except redis.exceptions.ResponseError:
+        # Another request converted it in the meantime
+        return redis_client.hgetall(session_key) or None
+    
+    if not session_data:
         return None
+    
+    session_info = json.loads(session_data)
+    pipe = redis_client.pipeline()
+    pipe.delete(session_key)
+    pipe.hset(session_key, mapping=session_info)
+    pipe.expire(session_key, ttl if ttl > 0 else SESSION_TTL)
+    pipe.execute()
+    return session_info
+
+def _read_session(session_token):
+    """Load a session hash, falling back to (and migrating) legacy JSON strings"""
+    session_key = _session_key(session_token)
+    try:
+        return redis_client.hgetall(session_key) or None
+    except redis.exceptions.ResponseError:
+        return _migrate_legacy_session(session_key)
+
+def _touch_session(session_token, session_info):
+    """Slide the session expiry, at most once per SESSION_TOUCH_INTERVAL"""
+    now = datetime.now()
+    last_activity = session_info.get('last_activity')
+    if last_activity and (now - datetime.fromisoformat(last_activity)).total_seconds() < SESSION_TOUCH_INTERVAL:
+        return
+    
+    session_key = _session_key(session_token)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(session_key, 'last_activity', now.isoformat())
+    pipe.expire(session_key, SESSION_TTL)
+    pipe.expire(_user_sessions_key(session_info.get('user_id'), session_info.get('user_type')), SESSION_TTL)
+    pipe.zadd(_session_expiry_key(session_info.get('user_type')), {session_token: time.time() + SESSION_TTL}, xx=True)
+    pipe.execute()
+    session_info['last_activity'] = now.isoformat()
 
 def verify_session(session_token):
     """Verify if session token is valid and update last activity"""
+    session_info = session_cache.get(session_token)
+    if session_info:
+        return session_info
+    
     try:
-        session_key = f'sessions:{session_token}'
-        session_data = redis_client.get(session_key)
+        session_info = _read_session(session_token)
         
-        if session_data:
-            # Update last activity time
-            session_info = json.loads(session_data)
-            session_info['last_activity'] = datetime.now().isoformat()
-            redis_client.setex(session_key, 86400, json.dumps(session_info))
+        if session_info:
+            _touch_session(session_token, session_info)
+            session_cache.put(session_token, session_info)
             return session_info
         return None
     except Exception as e:
@@ -391,37 +1303,94 @@ def verify_session(session_token):
         return None
 
 def logout_session(session_token):
-    """Remove session from Redis"""
+    """Remove session from Redis and from its owner's session index"""
     try:
-        redis_client.delete(f'sessions:{session_token}')
+        session_info = _read_session(session_token)
+        if session_info:
+            _end_session(session_token, session_info)
+        else:
+            redis_client.delete(_session_key(session_token))
+        publish_session_invalidation('token', session_token=session_token)
         return True
     except Exception as e:
         print(f"Error logging out session: {e}")
         return False
 
-def get_all_sessions():
-    """Get all active sessions from Redis"""
-    try:
-        sessions = {}
-        session_keys = redis_client.keys('sessions:*')
-        
-        for key in session_keys:
-            session_data = redis_client.get(key)
-            if session_data:
-                token = key.replace('sessions:', '')
-                sessions[token] = json.loads(session_data)
-        
-        return sessions
-    except Exception as e:
-        print(f"Error loading sessions: {e}")
-        return {}
+def _scan_key_batches(pattern, batch_size=None, stats=None):
+    """Yield lists of keys matching pattern using non-blocking SCAN"""
+    batch_size = batch_size or SESSION_SCAN_BATCH
+    cursor = 0
+    while True:
+        cursor, keys = redis_client.scan(cursor, match=pattern, count=batch_size)
+        if stats is not None:
+            stats['round_trips'] += 1
+        if keys:
+            yield keys
+        if cursor == 0:
+            break
+
+def _fetch_sessions(session_keys, stats=None):
+    """Fetch a batch of sessions with one pipelined HGETALL round trip"""
+    pipe = redis_client.pipeline(transaction=False)
+    for key in session_keys:
+        pipe.hgetall(key)
+    results = pipe.execute(raise_on_error=False)
+    if stats is not None:
+        stats['round_trips'] += 1
+    
+    batch = []
+    for key, session_info in zip(session_keys, results):
+        if isinstance(session_info, redis.exceptions.ResponseError):
+            # Legacy JSON-string session
+            session_info = _migrate_legacy_session(key)
+        if session_info:
+            batch.append((key[len('sessions:'):], session_info))
+    return batch
+
+def iter_session_batches(batch_size=None, stats=None):
+    """Yield batches of (session_token, session_info) for every live session.
+
+    Each batch costs one SCAN plus one pipelined fetch, so walking 10k
+    sessions takes about 2 * 10000 / batch_size round trips instead of
+    one GET per session. Pass a dict as stats to have round trips counted.
+    """
+    for session_keys in _scan_key_batches('sessions:*', batch_size, stats):
+        yield _fetch_sessions(session_keys, stats)
+
+def scan_session_page(user_type, cursor=0, prefix='', limit=ADMIN_PAGE_SIZE):
+    """Return (sessions, next_cursor) for one page of live sessions of a type.
+
+    Continues a SCAN over sessions:* from cursor with one pipelined fetch
+    per batch, keeping sessions whose user ID starts with prefix. Pages end
+    on SCAN batch boundaries, so they can run slightly over limit.
+    """
+    sessions = []
+    for _ in range(ADMIN_PAGE_MAX_ROUNDS):
+        cursor, keys = redis_client.scan(cursor, match='sessions:*', count=max(limit, SESSION_SCAN_BATCH))
+        for token, session_info in _fetch_sessions(keys) if keys else []:
+            if session_info.get('user_type', 'its') != user_type:
+                continue
+            if prefix and not session_info.get('user_id', '').startswith(prefix):
+                continue
+            sessions.append({
+                'user_id': session_info['user_id'],
+                'login_time_formatted': datetime.fromisoformat(session_info['login_time']).strftime('%Y-%m-%d %H:%M:%S'),
+                'session_token': token
+            })
+        if cursor == 0 or len(sessions) >= limit:
+            break
+    sessions.sort(key=lambda s: s['login_time_formatted'], reverse=True)
+    return sessions, (cursor or None)
 
 def clear_all_sessions():
-    """Clear all sessions from Redis"""
+    """Clear all sessions and per-user session indexes from Redis"""
     try:
-        session_keys = redis_client.keys('sessions:*')
-        if session_keys:
-            redis_client.delete(*session_keys)
+        for pattern in ('sessions:*', 'user_sessions:*'):
+            for keys in _scan_key_batches(pattern):
+                redis_client.delete(*keys)
+        redis_client.delete(*[_session_expiry_key(user_type) for user_type in USER_TYPES])
+        redis_client.mset({_session_counter_key(user_type): 0 for user_type in USER_TYPES})
+        publish_session_invalidation('all')
         return True
     except Exception as e:
         print(f"Error clearing sessions: {e}")
@@ -431,41 +1400,39 @@ def kick_session(session_token):
     """Remove a specific session"""
     return logout_session(session_token)
 
-def is_user_already_logged_in(user_id, user_type):
-    """Check if a user is already logged in on another device"""
-    try:
-        session_keys = redis_client.keys('sessions:*')
-        print(f"Checking for existing sessions for {user_type} user {user_id}. Found {len(session_keys)} total sessions.")
-        
-        for key in session_keys:
-            session_data = redis_client.get(key)
-            if session_data:
-                session_info = json.loads(session_data)
-                if (session_info.get('user_id') == str(user_id) and 
-                    session_info.get('user_type') == user_type):
-                    print(f"Found existing session for {user_type} user {user_id}")
-                    return True
-        
-        print(f"No existing sessions found for {user_type} user {user_id}")
-        return False
-    except Exception as e:
-        print(f"Error checking existing login: {e}")
-        return False
+def get_user_session_tokens(user_id, user_type):
+    """Return the live session tokens of a user from the per-user index.
+
+    Tokens whose session already expired (TTL) are pruned from the index
+    on the way, so the index converges without a separate cleanup job.
+    """
+    index_key = _user_sessions_key(user_id, user_type)
+    tokens = list(redis_client.smembers(index_key))
+    if not tokens:
+        return []
+    
+    pipe = redis_client.pipeline()
+    for token in tokens:
+        pipe.exists(_session_key(token))
+    alive = pipe.execute()
+    
+    stale_tokens = [token for token, exists in zip(tokens, alive) if not exists]
+    if stale_tokens:
+        redis_client.srem(index_key, *stale_tokens)
+    return [token for token, exists in zip(tokens, alive) if exists]
 
 def remove_existing_user_sessions(user_id, user_type):
     """Remove all existing sessions for a specific user"""
     try:
-        session_keys = redis_client.keys('sessions:*')
-        removed_count = 0
-        
-        for key in session_keys:
-            session_data = redis_client.get(key)
-            if session_data:
-                session_info = json.loads(session_data)
-                if (session_info.get('user_id') == str(user_id) and 
-                    session_info.get('user_type') == user_type):
-                    redis_client.delete(key)
-                    removed_count += 1
+        tokens = get_user_session_tokens(user_id, user_type)
+        session_info = {'user_id': str(user_id), 'user_type': user_type}
+        pipe = redis_client.pipeline()
+        for token in tokens:
+            _end_session(token, session_info, client=pipe)
+        pipe.delete(_user_sessions_key(user_id, user_type))
+        pipe.execute()
+        publish_session_invalidation('user', user_id=str(user_id), user_type=user_type)
+        removed_count = len(tokens)
         
         print(f"Removed {removed_count} existing sessions for {user_type} user {user_id}")
         return removed_count
@@ -473,6 +1440,268 @@ def remove_existing_user_sessions(user_id, user_type):
         print(f"Error removing existing sessions: {e}")
         return 0
 
+# Atomic login admission
+LOGIN_OK = 'ok'
+LOGIN_NOT_AUTHORIZED = 'not_authorized'
+LOGIN_ALREADY_LOGGED_IN = 'already_logged_in'
+LOGIN_ERROR = 'error'
+
+# KEYS: allow-list set or bitmap shard, user session index, new session key, expiry index,
+#       live counter, activity set
+# ARGV: user id, new session token, TTL seconds, expiry timestamp, activity member,
+#       now (epoch seconds), bitmap offset ('' for the set backend),
+#       then session hash field/value pairs
+# Session keys of indexed tokens are derived inside the script, so this
+# assumes a single (non-cluster) Redis, which is what we deploy on.
+ADMIT_LOGIN_SCRIPT = """
+local allowed
+if ARGV[7] == '' then
+    allowed = redis.call('SISMEMBER', KEYS[1], ARGV[1])
+else
+    allowed = redis.call('GETBIT', KEYS[1], ARGV[7])
+end
+if allowed == 0 then
+    return {'not_authorized'}
+end
+for _, token in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    if redis.call('EXISTS', 'sessions:' .. token) == 1 then
+        return {'already_logged_in'}
+    end
+    redis.call('SREM', KEYS[2], token)
+end
+redis.call('HSET', KEYS[3], unpack(ARGV, 8))
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+redis.call('SADD', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+redis.call('ZADD', KEYS[4], ARGV[4], ARGV[2])
+redis.call('INCR', KEYS[5])
+redis.call('ZADD', KEYS[6], ARGV[6], ARGV[5])
+return {'ok'}
+"""
+admit_login_script = redis_client.register_script(ADMIT_LOGIN_SCRIPT)
+
+def admit_login(user_id, user_type):
+    """Check the allow-list, enforce single-device and create the session
+    in one server-side script so concurrent logins cannot both get in.
+
+    Returns a (status, session_token) tuple where status is one of the
+    LOGIN_* constants and session_token is only set for LOGIN_OK.
+    """
+    session_token = secrets.token_urlsafe(32)
+    now = datetime.now()
+    session_data = {
+        'user_type': user_type,
+        'user_id': str(user_id),
+        'login_time': now.isoformat(),
+        'last_activity': now.isoformat()
+    }
+    
+    try:
+        allowlist_key, bit_offset = allowlist_location(user_type, user_id)
+        result = admit_login_script(
+            keys=[allowlist_key, _user_sessions_key(user_id, user_type), _session_key(session_token),
+                  _session_expiry_key(user_type), _session_counter_key(user_type), USER_ACTIVITY_KEY],
+            args=[str(user_id), session_token, SESSION_TTL, int(time.time()) + SESSION_TTL,
+                  _activity_member(user_id, user_type), time.time(), bit_offset]
+                 + [item for field in session_data.items() for item in field]
+        )
+        status = result[0]
+        if status == LOGIN_OK:
+            return LOGIN_OK, session_token
+        return status, None
+    except Exception as e:
+        print(f"Error admitting login for {user_type} user {user_id}: {e}")
+        return LOGIN_ERROR, None
+
+# Login rate limiting
+def _parse_rate(value):
+    """'attempts/seconds' -> (bucket capacity, tokens refilled per second)"""
+    attempts, seconds = value.split('/')
+    return int(attempts), int(attempts) / float(seconds)
+
+# Token buckets per client IP and per submitted ID / admin username.
+# The per-IP login limit is generous because a whole venue may share one NAT.
+LOGIN_RATE_LIMIT_IP = _parse_rate(os.environ.get('LOGIN_RATE_LIMIT_IP', '120/60'))
+LOGIN_RATE_LIMIT_ID = _parse_rate(os.environ.get('LOGIN_RATE_LIMIT_ID', '10/60'))
+ADMIN_LOGIN_RATE_LIMIT_IP = _parse_rate(os.environ.get('ADMIN_LOGIN_RATE_LIMIT_IP', '10/300'))
+ADMIN_LOGIN_RATE_LIMIT_USER = _parse_rate(os.environ.get('ADMIN_LOGIN_RATE_LIMIT_USER', '5/300'))
+
+# KEYS: one bucket hash per limit
+# ARGV: now (epoch seconds), then capacity and refill rate (tokens/second) per key
+# A token is taken from every bucket only if all of them have one, so a
+# request rejected by one limit does not drain the others. Returns
+# {1, 0} when allowed or {0, seconds until a token is available}.
+RATE_LIMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return {0, math.ceil(wait)}
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'updated', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate))
+end
+return {1, 0}
+"""
+rate_limit_script = redis_client.register_script(RATE_LIMIT_SCRIPT)
+
+def check_rate_limits(scope, limits):
+    """Take one token from each (identifier, (capacity, rate)) bucket of a scope.
+
+    Returns (allowed, retry_after_seconds). Fails open if Redis is
+    unavailable, so a Redis hiccup never locks everyone out.
+    """
+    keys = []
+    args = [time.time()]
+    for identifier, (capacity, rate) in limits:
+        keys.append(f'ratelimit:{scope}:{identifier}')
+        args.extend([capacity, rate])
+    try:
+        allowed, retry_after = rate_limit_script(keys=keys, args=args)
+        return bool(allowed), int(retry_after)
+    except Exception as e:
+        print(f"Error checking rate limits for {scope}: {e}")
+        return True, 0
+
+def rate_limited_response(template_name, retry_after):
+    """429 page telling the user how long to wait"""
+    response = make_response(render_page(
+        template_name,
+        error=f"Too many login attempts. Please wait {retry_after} seconds and try again."), 429)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def login_rate_limits(user_id):
+    """Buckets applied to a viewer login attempt"""
+    limits = [(f'ip:{request.remote_addr}', LOGIN_RATE_LIMIT_IP)]
+    if len(user_id) == 8 and user_id.isdigit():
+        limits.append((f'id:{user_id}', LOGIN_RATE_LIMIT_ID))
+    return limits
+
+def rebuild_user_session_index():
+    """Rebuild every per-user session index from the live sessions.
+
+    Needed once for deployments that have sessions created before the
+    index existed, and safe to run at any time to repair drift. Live
+    tokens are unioned into the existing indexes and only tokens whose
+    session key is gone are removed, so logins admitted while the walk
+    runs keep their index entry.
+    """
+    try:
+        users = set()
+        for batch in iter_session_batches():
+            pipe = redis_client.pipeline(transaction=False)
+            for token, session_info in batch:
+                index_key = _user_sessions_key(session_info.get('user_id'), session_info.get('user_type'))
+                pipe.sadd(index_key, token)
+                pipe.expire(index_key, SESSION_TTL)
+                users.add(index_key)
+            pipe.execute()
+        
+        # Prune tokens whose session has expired or ended
+        for index_keys in _scan_key_batches('user_sessions:*'):
+            pipe = redis_client.pipeline(transaction=False)
+            for index_key in index_keys:
+                pipe.smembers(index_key)
+            indexed = [(index_key, token) for index_key, tokens in zip(index_keys, pipe.execute()) for token in tokens]
+            
+            pipe = redis_client.pipeline(transaction=False)
+            for _, token in indexed:
+                pipe.exists(_session_key(token))
+            prune = redis_client.pipeline(transaction=False)
+            for (index_key, token), exists in zip(indexed, pipe.execute()):
+                if not exists:
+                    prune.srem(index_key, token)
+            prune.execute()
+        
+        print(f"Rebuilt session index for {len(users)} users")
+        return len(users)
+    except Exception as e:
+        print(f"Error rebuilding session index: {e}")
+        return None
+
+def get_active_session_counts():
+    """Read the live per-type session counters in one round trip"""
+    try:
+        values = redis_client.mget([_session_counter_key(user_type) for user_type in USER_TYPES])
+        return {user_type: max(int(value or 0), 0) for user_type, value in zip(USER_TYPES, values)}
+    except Exception as e:
+        print(f"Error reading session counters: {e}")
+        return {user_type: 0 for user_type in USER_TYPES}
+
+def expire_session_counters(batch_size=None):
+    """Decrement the counters for sessions that ended through TTL expiry"""
+    batch_size = batch_size or SESSION_SCAN_BATCH
+    expired_count = 0
+    for user_type in USER_TYPES:
+        while True:
+            expired = expire_sessions_script(
+                keys=[_session_expiry_key(user_type), _session_counter_key(user_type)],
+                args=[int(time.time()), batch_size]
+            )
+            expired_count += expired
+            if expired < batch_size:
+                break
+    return expired_count
+
+def reconcile_session_counters(keep_lease=None):
+    """Recount live sessions and correct the counters and expiry index.
+
+    Sessions missing from the expiry index (e.g. created before it
+    existed) are added with a full TTL; the expiry sweep corrects the
+    score once it comes due. Users without an activity record get one
+    now, so the inactivity sweep can see them.
+    
+    The walk can take seconds, so the counters are corrected by the
+    difference from their value before it started rather than overwritten;
+    logins and logouts counted meanwhile are kept. keep_lease, if given, is
+    called between batches; when it returns False the walk stops and the
+    counters are left alone.
+    """
+    try:
+        counter_keys = [_session_counter_key(user_type) for user_type in USER_TYPES]
+        snapshot = dict(zip(USER_TYPES, (int(value or 0) for value in redis_client.mget(counter_keys))))
+        counts = {user_type: 0 for user_type in USER_TYPES}
+        for batch in iter_session_batches():
+            if keep_lease and not keep_lease():
+                break
+            pipe = redis_client.pipeline(transaction=False)
+            for token, session_info in batch:
+                user_type = session_info.get('user_type')
+                if user_type in counts:
+                    counts[user_type] += 1
+                    pipe.zadd(_session_expiry_key(user_type), {token: time.time() + SESSION_TTL}, nx=True)
+                    pipe.zadd(USER_ACTIVITY_KEY, {_activity_member(session_info.get('user_id'), user_type): time.time()}, nx=True)
+            pipe.execute()
+        
+        if keep_lease and not keep_lease():
+            print("Session reconcile stopped: sweeper lease lost")
+            return None
+        pipe = redis_client.pipeline(transaction=False)
+        for user_type, count in counts.items():
+            if count != snapshot[user_type]:
+                pipe.incrby(_session_counter_key(user_type), count - snapshot[user_type])
+        pipe.execute()
+        return counts
+    except Exception as e:
+        print(f"Error reconciling session counters: {e}")
+        return None
+
 def admin_required(f):
     """Decorator for admin-only routes"""
     @wraps(f)
@@ -482,15 +1711,112 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Versioned webinar settings cache
+SETTINGS_CACHE_KEYS = {
+    'its': 'cached:webinar_settings',
+    'majlis': 'cached:majlis_settings'
+}
+# Seconds a worker trusts its parsed settings before re-checking the version
+SETTINGS_VERSION_CHECK_INTERVAL = float(os.environ.get('SETTINGS_VERSION_CHECK_INTERVAL', '2'))
+
+# kind -> {'version', 'settings', 'checked_at'}
+settings_memo = {}
+settings_memo_lock = threading.Lock()
+
+def _settings_version_key(kind):
+    """Redis counter bumped whenever the cached settings of a kind change"""
+    return f'cached:settings_version:{kind}'
+
+def settings_to_dict(settings):
+    """Serialize a WebinarSetting / MajlisWebinarSetting row for the cache"""
+    return {
+        "embed_url": settings.embed_url,
+        "youtube_video_id": settings.youtube_video_id,
+        "webinar_title": settings.webinar_title,
+        "webinar_description": settings.webinar_description,
+        "webinar_date": settings.webinar_date,
+        "webinar_time": settings.webinar_time,
+        "webinar_speaker": settings.webinar_speaker,
+        "start_time": settings.start_time.isoformat() if settings.start_time else None,
+        "end_time": settings.end_time.isoformat() if settings.end_time else None,
+        "no_webinar": settings.no_webinar
+    }
+
+def store_cached_settings(kind, settings_dict):
+    """Write settings to the Redis cache and bump their version atomically"""
+    pipe = redis_client.pipeline()
+    pipe.set(SETTINGS_CACHE_KEYS[kind], json.dumps(settings_dict))
+    pipe.incr(_settings_version_key(kind))
+    return pipe.execute()[1]
+
+def write_through_settings(kind, settings):
+    """Push freshly committed settings into the cache and tell viewers.
+
+    Only the settings key of the given kind is rewritten, so the ID sets
+    are left alone. The local memo is replaced right away; other workers
+    pick the new version up on their next check.
+    
+    Every open page reloads on webinar_updated, so it is only sent when the
+    stream becomes available or unavailable, or the live video changes;
+    edits to the title, description or a future schedule stay silent.
+    """
+    previous_data = redis_client.get(SETTINGS_CACHE_KEYS[kind])
+    previous = json.loads(previous_data) if previous_data else None
+    settings_dict = settings_to_dict(settings)
+    version = store_cached_settings(kind, settings_dict)
+    with settings_memo_lock:
+        settings_memo[kind] = {
+            'version': str(version),
+            'settings': settings_dict,
+            'checked_at': time.monotonic()
+        }
+    
+    available = is_webinar_time_active(settings_dict)
+    if (previous is not None and available == is_webinar_time_active(previous)
+            and (not available or previous.get('youtube_video_id') == settings_dict.get('youtube_video_id'))):
+        return
+    socketio.emit('webinar_updated', {
+        'user_type': kind,
+        'version': version,
+        'available': available,
+        'timestamp': datetime.now().isoformat()
+    }, room=f'type_{kind}')
+
+def _load_cached_settings(kind, load_from_db):
+    """Return parsed settings memoized per worker and keyed by the Redis version.
+
+    Within SETTINGS_VERSION_CHECK_INTERVAL no Redis call is made at all;
+    after that one GET of the version, and the settings are only fetched and
+    decoded again when the version has moved.
+    """
+    now = time.monotonic()
+    memo = settings_memo.get(kind)
+    if memo and now - memo['checked_at'] < SETTINGS_VERSION_CHECK_INTERVAL:
+        return dict(memo['settings'])
+    
+    version = redis_client.get(_settings_version_key(kind))
+    if memo and memo['version'] == version:
+        memo['checked_at'] = now
+        return dict(memo['settings'])
+    
+    pipe = redis_client.pipeline()
+    pipe.get(_settings_version_key(kind))
+    pipe.get(SETTINGS_CACHE_KEYS[kind])
+    version, settings_data = pipe.execute()
+    if settings_data:
+        settings = json.loads(settings_data)
+    else:
+        # Fallback to database if cache is empty
+        settings = load_from_db()
+    
+    with settings_memo_lock:
+        settings_memo[kind] = {'version': version, 'settings': settings, 'checked_at': now}
+    return dict(settings)
+
 def load_webinar_settings():
     """Load ITS webinar settings from Redis cache"""
     try:
-        settings_data = redis_client.get('cached:webinar_settings')
-        if settings_data:
-            return json.loads(settings_data)
-        else:
-            # Fallback to database if cache is empty
-            return _load_its_settings_from_db()
+        return _load_cached_settings('its', _load_its_settings_from_db)
     except Exception as e:
         print(f"Error loading ITS webinar settings from cache: {e}")
         return _load_its_settings_from_db()
@@ -498,12 +1824,7 @@ def load_webinar_settings():
 def load_majlis_webinar_settings():
     """Load Majlis webinar settings from Redis cache"""
     try:
-        settings_data = redis_client.get('cached:majlis_settings')
-        if settings_data:
-            return json.loads(settings_data)
-        else:
-            # Fallback to database if cache is empty
-            return _load_majlis_settings_from_db()
+        return _load_cached_settings('majlis', _load_majlis_settings_from_db)
     except Exception as e:
         print(f"Error loading Majlis webinar settings from cache: {e}")
         return _load_majlis_settings_from_db()
@@ -574,6 +1895,11 @@ def _load_majlis_settings_from_db():
         "no_webinar": False
     }
 
+@lru_cache(maxsize=64)
+def _parse_iso_datetime(value):
+    """Parse an ISO timestamp from the settings cache"""
+    return datetime.fromisoformat(value)
+
 def is_webinar_time_active(webinar_data):
     """Check if the current time is within the webinar's start and end time"""
     try:
@@ -587,9 +1913,9 @@ def is_webinar_time_active(webinar_data):
         if not start_time_str or not end_time_str:
             return not webinar_data.get('no_webinar', False)
         
-        # Parse the ISO format datetime strings
-        start_time = datetime.fromisoformat(start_time_str)
-        end_time = datetime.fromisoformat(end_time_str)
+        # Parse the ISO format datetime strings (memoized, they rarely change)
+        start_time = _parse_iso_datetime(start_time_str)
+        end_time = _parse_iso_datetime(end_time_str)
         
         # Check if current time is within the range
         if start_time <= current_time <= end_time:
@@ -2159,7 +3485,7 @@ WEBINAR_TEMPLATE_IMPROVED = '''
             </div>
         </div>
         <div class="user-info">
-            <div class="user-id">ITS ID: {{ its_id }}</div>
+            <div class="user-id">ITS ID: <span data-user-id>{{ its_id }}</span></div>
             <div class="logout-dropdown">
                 <a href="javascript:void(0)" class="logout-btn" onclick="toggleDropdown()">Session <i class="fas fa-angle-down"></i></a>
                 <div class="dropdown-content" id="sessionDropdown">
@@ -2683,6 +4009,19 @@ WEBINAR_TEMPLATE_IMPROVED = '''
     </style>
     
     <script>
+        // Per-user details are not part of the cached page shell; fill them in from /api/status
+        document.addEventListener('DOMContentLoaded', function() {
+            const userIdFields = document.querySelectorAll('[data-user-id]');
+            if (!userIdFields.length || userIdFields[0].textContent) return;
+            fetch("{{ url_for('api_status') }}", { credentials: 'same-origin' })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.logged_in) {
+                        userIdFields.forEach(field => { field.textContent = data.user_id; });
+                    }
+                });
+        });
+
         // Session management dropdown toggle
         function toggleDropdown() {
             const dropdown = document.getElementById('sessionDropdown');
@@ -3777,7 +5116,7 @@ MAJLIS_WEBINAR_TEMPLATE = '''
 
             // Initialize WebSocket connection
             const socket = io({
-                transports: ['websocket', 'polling'],
+                transports: {{ socketio_transports|tojson }},
                 reconnection: true,
                 reconnectionDelay: 1000,
                 reconnectionAttempts: 5
@@ -4476,7 +5815,7 @@ NO_WEBINAR_TEMPLATE = '''
             </div>
         </div>
         <div class="user-info">
-            <div class="its-id-badge">ITS ID: {{ its_id }}</div>
+            <div class="its-id-badge">ITS ID: <span data-user-id>{{ its_id }}</span></div>
             <div class="logout-dropdown">
                 <a href="javascript:void(0)" class="logout-btn" onclick="toggleDropdown()">Session <i class="fas fa-angle-down"></i></a>
                 <div class="dropdown-content" id="sessionDropdown">
@@ -4557,6 +5896,19 @@ NO_WEBINAR_TEMPLATE = '''
     </style>
 
     <script>
+        // Per-user details are not part of the cached page shell; fill them in from /api/status
+        document.addEventListener('DOMContentLoaded', function() {
+            const userIdFields = document.querySelectorAll('[data-user-id]');
+            if (!userIdFields.length || userIdFields[0].textContent) return;
+            fetch("{{ url_for('api_status') }}", { credentials: 'same-origin' })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.logged_in) {
+                        userIdFields.forEach(field => { field.textContent = data.user_id; });
+                    }
+                });
+        });
+
         // Session management dropdown toggle
         function toggleDropdown() {
             const dropdown = document.getElementById('sessionDropdown');
@@ -4616,7 +5968,7 @@ NO_WEBINAR_TEMPLATE = '''
         wsScript.src = 'https://cdn.socket.io/4.5.4/socket.io.min.js';
         wsScript.onload = function() {
             const socket = io({
-                transports: ['websocket', 'polling'],
+                transports: {{ socketio_transports|tojson }},
                 reconnection: true,
                 reconnectionDelay: 1000,
                 reconnectionAttempts: 5
@@ -4627,6 +5979,7 @@ NO_WEBINAR_TEMPLATE = '''
 
             // Webinar became available - reload page
             socket.on('webinar_updated', function(data) {
+                if (!data.available) return;
                 alert('A webinar stream is now available! The page will refresh.');
                 setTimeout(() => window.location.reload(), 1000);
             });
@@ -4667,12 +6020,17 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!-- Admin dashboard template remains the same -->
 # API Health Check route
 @app.route('/health')
 def health_check():
-    """Health check endpoint for monitoring"""
+    """Health check endpoint for monitoring; 503 "starting" until the cache is warm"""
+    ready = is_app_ready()
+    # The startup error itself stays in the logs; it can name hosts or credentials
+    startup = {key: value for key, value in startup_state.items() if key != 'error'}
+    startup['retrying'] = startup_state['error'] is not None
     return jsonify({
-        'status': 'ok',
+        'status': 'ok' if ready else 'starting',
         'timestamp': datetime.now().isoformat(),
-        'version': '2.0.0'
-    })
+        'version': '2.0.0',
+        'startup': startup
+    }), 200 if ready else 503
 
 @app.route('/api/status')
 def api_status():
@@ -4686,12 +6044,19 @@ def api_status():
     if not session_info:
         return jsonify({'logged_in': False})
     
-    return jsonify({
+    # The answer only changes with the session itself, so let clients revalidate cheaply
+    etag = hashlib.sha256(f"{session_token}:{session_info['login_time']}".encode()).hexdigest()[:32]
+    if request.if_none_match.contains_weak(etag):
+        return not_modified_response(etag)
+    
+    response = jsonify({
         'logged_in': True,
         'user_id': session_info['user_id'],
         'user_type': session_info['user_type'],
         'login_time': session_info['login_time']
     })
+    response.set_etag(etag, weak=True)
+    return response
 
 # Main route for login
 @app.route('/', methods=['GET', 'POST'])
@@ -4710,28 +6075,35 @@ def index():
     if request.method == 'POST':
         user_id = request.form.get('its_id', '').strip()  # Field name kept as its_id for backward compatibility
 
+        # Throttle before any allow-list, filter or DB work
+        allowed, retry_after = check_rate_limits('login', login_rate_limits(user_id))
+        if not allowed:
+            return rate_limited_response('login', retry_after)
+
         if not user_id or len(user_id) != 8 or not user_id.isdigit():
-            return render_template_string(LOGIN_TEMPLATE, error="Please enter a valid 8-digit Asbaq/Majlis ID.")
+            return render_page('login', error="Please enter a valid 8-digit Asbaq/Majlis ID.")
 
-        # Check if ID exists in both ITS and Majlis tables
-        is_its_valid = is_its_id_valid(user_id)
-        is_majlis_valid = is_majlis_id_valid(user_id)
+        # Check if ID exists in both ITS and Majlis tables (one round trip)
+        roles = resolve_user_roles(user_id)
+        is_its_valid = 'its' in roles
+        is_majlis_valid = 'majlis' in roles
 
         if is_its_valid and is_majlis_valid:
             # ID exists in both tables - show role selection
             print(f"Dual-access detected for user {user_id}")
-            return render_template_string(ROLE_SELECTION_TEMPLATE, user_id=user_id)
+            return render_page('role_selection', user_id=user_id)
 
         # Check ITS ID
         elif is_its_valid:
-            # Check if user is already logged in on another device
-            if is_user_already_logged_in(user_id, 'its'):
+            # Allow-list, single-device check and session creation in one atomic step
+            status, session_token = admit_login(user_id, 'its')
+            if status == LOGIN_ALREADY_LOGGED_IN:
                 print(f"Blocked login attempt for ITS user {user_id} - already logged in")
-                return render_template_string(LOGIN_TEMPLATE, error="This Asbaq ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
-
-            session_token = create_session(user_id, 'its')
-            if not session_token:
-                return render_template_string(LOGIN_TEMPLATE, error="An error occurred during login. Please try again.")
+                return render_page('login', error="This Asbaq ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
+            elif status == LOGIN_NOT_AUTHORIZED:
+                return render_page('login', error="ID not authorized. Please contact the administrator.")
+            elif status != LOGIN_OK:
+                return render_page('login', error="An error occurred during login. Please try again.")
 
             print(f"Successfully created new session for ITS user {user_id}")
             response = redirect(url_for('webinar'))
@@ -4740,14 +6112,15 @@ def index():
 
         # Check Majlis ID
         elif is_majlis_valid:
-            # Check if user is already logged in on another device
-            if is_user_already_logged_in(user_id, 'majlis'):
+            # Allow-list, single-device check and session creation in one atomic step
+            status, session_token = admit_login(user_id, 'majlis')
+            if status == LOGIN_ALREADY_LOGGED_IN:
                 print(f"Blocked login attempt for Majlis user {user_id} - already logged in")
-                return render_template_string(LOGIN_TEMPLATE, error="This Majlis ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
-
-            session_token = create_session(user_id, 'majlis')
-            if not session_token:
-                return render_template_string(LOGIN_TEMPLATE, error="An error occurred during login. Please try again.")
+                return render_page('login', error="This Majlis ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
+            elif status == LOGIN_NOT_AUTHORIZED:
+                return render_page('login', error="ID not authorized. Please contact the administrator.")
+            elif status != LOGIN_OK:
+                return render_page('login', error="An error occurred during login. Please try again.")
 
             print(f"Successfully created new session for Majlis user {user_id}")
             response = redirect(url_for('majlis'))
@@ -4755,9 +6128,9 @@ def index():
             return response
 
         else:
-            return render_template_string(LOGIN_TEMPLATE, error="ID not authorized. Please contact the administrator.")
+            return render_page('login', error="ID not authorized. Please contact the administrator.")
     
-    return render_template_string(LOGIN_TEMPLATE)
+    return page_shell_response('login')
 
 @app.route('/webinar')
 def webinar():
@@ -4781,9 +6154,9 @@ def webinar():
     webinar_data = load_webinar_settings_with_time_check()
     
     if webinar_data.get('no_webinar', False):
-        return render_template_string(NO_WEBINAR_TEMPLATE, its_id=user_id, session_token=session_token)
+        return page_shell_response('no_webinar', user_id=user_id)
     else:
-        return render_template_string(WEBINAR_TEMPLATE_IMPROVED, its_id=user_id, session_token=session_token, **webinar_data)
+        return page_shell_response('webinar', user_id=user_id, **webinar_data)
 
 @app.route('/majlis')
 def majlis():
@@ -4807,9 +6180,9 @@ def majlis():
     webinar_data = load_majlis_webinar_settings_with_time_check()
     
     if webinar_data.get('no_webinar', False):
-        return render_template_string(NO_WEBINAR_TEMPLATE, its_id=user_id, session_token=session_token)
+        return page_shell_response('no_webinar', user_id=user_id)
     else:
-        return render_template_string(WEBINAR_TEMPLATE_IMPROVED, its_id=user_id, session_token=session_token, **webinar_data)
+        return page_shell_response('webinar', user_id=user_id, **webinar_data)
 
 @app.route('/select_role', methods=['POST'])
 def select_role():
@@ -4817,6 +6190,10 @@ def select_role():
     user_id = request.form.get('user_id', '').strip()
     role = request.form.get('role', '').strip()
 
+    allowed, retry_after = check_rate_limits('login', login_rate_limits(user_id))
+    if not allowed:
+        return rate_limited_response('login', retry_after)
+
     # Validate inputs
     if not user_id or len(user_id) != 8 or not user_id.isdigit():
         return redirect(url_for('index'))
@@ -4826,18 +6203,15 @@ def select_role():
 
     # Verify the user_id is valid for the selected role
     if role == 'its':
-        if not is_its_id_valid(user_id):
-            return render_template_string(LOGIN_TEMPLATE, error="Invalid access. Please try again.")
-
-        # Check if already logged in
-        if is_user_already_logged_in(user_id, 'its'):
+        # Verify the allow-list, check single-device and create the ITS session atomically
+        status, session_token = admit_login(user_id, 'its')
+        if status == LOGIN_NOT_AUTHORIZED:
+            return render_page('login', error="Invalid access. Please try again.")
+        elif status == LOGIN_ALREADY_LOGGED_IN:
             print(f"Blocked login attempt for ITS user {user_id} - already logged in")
-            return render_template_string(LOGIN_TEMPLATE, error="This ITS ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
-
-        # Create ITS session
-        session_token = create_session(user_id, 'its')
-        if not session_token:
-            return render_template_string(LOGIN_TEMPLATE, error="An error occurred during login. Please try again.")
+            return render_page('login', error="This ITS ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
+        elif status != LOGIN_OK:
+            return render_page('login', error="An error occurred during login. Please try again.")
 
         print(f"Successfully created new ITS session for dual-access user {user_id}")
         response = redirect(url_for('webinar'))
@@ -4845,18 +6219,15 @@ def select_role():
         return response
 
     elif role == 'majlis':
-        if not is_majlis_id_valid(user_id):
-            return render_template_string(LOGIN_TEMPLATE, error="Invalid access. Please try again.")
-
-        # Check if already logged in
-        if is_user_already_logged_in(user_id, 'majlis'):
+        # Verify the allow-list, check single-device and create the Majlis session atomically
+        status, session_token = admit_login(user_id, 'majlis')
+        if status == LOGIN_NOT_AUTHORIZED:
+            return render_page('login', error="Invalid access. Please try again.")
+        elif status == LOGIN_ALREADY_LOGGED_IN:
             print(f"Blocked login attempt for Majlis user {user_id} - already logged in")
-            return render_template_string(LOGIN_TEMPLATE, error="This Majlis ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
-
-        # Create Majlis session
-        session_token = create_session(user_id, 'majlis')
-        if not session_token:
-            return render_template_string(LOGIN_TEMPLATE, error="An error occurred during login. Please try again.")
+            return render_page('login', error="This Majlis ID is already logged in on another device. Only one device is allowed at a time. Contact admin if you need to force logout.")
+        elif status != LOGIN_OK:
+            return render_page('login', error="An error occurred during login. Please try again.")
 
         print(f"Successfully created new Majlis session for dual-access user {user_id}")
         response = redirect(url_for('majlis'))
@@ -5358,6 +6729,11 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!DOCTYPE html>
                     <i class="fas fa-sync-alt"></i> Refresh Cache
                 </button>
             </form>
+            <form method="POST" action="{{ url_for('admin_rebuild_session_index') }}" style="display: inline;">
+                <button type="submit" class="btn btn-warning">
+                    <i class="fas fa-tools"></i> Rebuild Session Index
+                </button>
+            </form>
             <form method="POST" action="{{ url_for('admin_clear_sessions') }}" style="display: inline;">
                 <button type="submit" class="btn btn-danger" onclick="return confirm('Clear all active sessions?')">
                     <i class="fas fa-trash-alt"></i> Clear All Sessions
@@ -5407,6 +6783,19 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!DOCTYPE html>
                     </form>
                 </div>
 
+                <div class="card">
+                    <h3 class="card-title"><i class="fas fa-file-csv"></i> Upload Asbaq ID File</h3>
+                    <form method="POST" action="{{ url_for('admin_upload_its_ids') }}" enctype="multipart/form-data">
+                        <div class="form-group">
+                            <label for="its_id_file">CSV, text or XLSX file of Asbaq IDs:</label>
+                            <input type="file" id="its_id_file" name="id_file" accept=".csv,.txt,.xlsx" required>
+                        </div>
+                        <button type="submit" class="btn btn-success">
+                            <i class="fas fa-file-upload"></i> Upload IDs
+                        </button>
+                    </form>
+                </div>
+
                 <div class="card">
                     <h3 class="card-title"><i class="fas fa-video"></i> Asbaq Live Settings</h3>
                     <form method="POST" action="{{ url_for('admin_update_webinar_settings') }}">
@@ -5466,22 +6855,15 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!DOCTYPE html>
 
                 <div class="card">
                     <h3 class="card-title">
-                        <i class="fas fa-list"></i> Current ITS IDs ({{ its_ids|length }})
+                        <i class="fas fa-list"></i> Current ITS IDs ({{ stats.total_its }})
                     </h3>
-                    <div class="id-list">
-                        {% for id in its_ids %}
-                        <div class="id-item">
-                            <span>{{ id }}</span>
-                            <form method="POST" action="{{ url_for('admin_delete_its') }}" style="display: inline;">
-                                <input type="hidden" name="its_id" value="{{ id }}">
-                                <button type="submit" class="btn btn-danger btn-sm"
-                                        onclick="return confirm('Delete Asbaq ID {{ id }}?')">
-                                    <i class="fas fa-trash"></i>
-                                </button>
-                            </form>
-                        </div>
-                        {% endfor %}
+                    <div class="form-group">
+                        <input type="text" class="list-search" data-list="its-id-list" maxlength="8"
+                               placeholder="Search by ID prefix...">
                     </div>
+                    <div class="id-list lazy-list" id="its-id-list" data-kind="ids" data-user-type="its"
+                         data-url="{{ url_for('admin_api_ids', user_type='its') }}"></div>
+                    <button type="button" class="btn btn-sm load-more" data-list="its-id-list">Load more</button>
                     <form method="POST" action="{{ url_for('admin_delete_all_its') }}">
                         <button type="submit" class="btn btn-danger"
                                 onclick="return confirm('Delete ALL Asbaq IDs?')">
@@ -5522,6 +6904,19 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!DOCTYPE html>
                     </form>
                 </div>
 
+                <div class="card">
+                    <h3 class="card-title"><i class="fas fa-file-csv"></i> Upload Majlis ID File</h3>
+                    <form method="POST" action="{{ url_for('admin_upload_majlis_ids') }}" enctype="multipart/form-data">
+                        <div class="form-group">
+                            <label for="majlis_id_file">CSV, text or XLSX file of Majlis IDs:</label>
+                            <input type="file" id="majlis_id_file" name="id_file" accept=".csv,.txt,.xlsx" required>
+                        </div>
+                        <button type="submit" class="btn btn-success">
+                            <i class="fas fa-file-upload"></i> Upload IDs
+                        </button>
+                    </form>
+                </div>
+
                 <div class="card">
                     <h3 class="card-title"><i class="fas fa-video"></i> Majlis Webinar Settings</h3>
                     <form method="POST" action="{{ url_for('admin_update_majlis_settings') }}">
@@ -5581,22 +6976,15 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!DOCTYPE html>
 
                 <div class="card">
                     <h3 class="card-title">
-                        <i class="fas fa-list"></i> Current Majlis IDs ({{ majlis_ids|length }})
+                        <i class="fas fa-list"></i> Current Majlis IDs ({{ stats.total_majlis }})
                     </h3>
-                    <div class="id-list">
-                        {% for id in majlis_ids %}
-                        <div class="id-item">
-                            <span>{{ id }}</span>
-                            <form method="POST" action="{{ url_for('admin_delete_majlis') }}" style="display: inline;">
-                                <input type="hidden" name="majlis_id" value="{{ id }}">
-                                <button type="submit" class="btn btn-danger btn-sm" 
-                                        onclick="return confirm('Delete Majlis ID {{ id }}?')">
-                                    <i class="fas fa-trash"></i>
-                                </button>
-                            </form>
-                        </div>
-                        {% endfor %}
+                    <div class="form-group">
+                        <input type="text" class="list-search" data-list="majlis-id-list" maxlength="8"
+                               placeholder="Search by ID prefix...">
                     </div>
+                    <div class="id-list lazy-list" id="majlis-id-list" data-kind="ids" data-user-type="majlis"
+                         data-url="{{ url_for('admin_api_ids', user_type='majlis') }}"></div>
+                    <button type="button" class="btn btn-sm load-more" data-list="majlis-id-list">Load more</button>
                     <form method="POST" action="{{ url_for('admin_delete_all_majlis') }}">
                         <button type="submit" class="btn btn-danger" 
                                 onclick="return confirm('Delete ALL Majlis IDs?')">
@@ -5611,90 +6999,46 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!DOCTYPE html>
             <div class="dashboard-grid">
                 <div class="card">
                     <h3 class="card-title">
-                        <i class="fas fa-users"></i> Active ITS Sessions ({{ its_sessions|length }})
+                        <i class="fas fa-users"></i> Active ITS Sessions ({{ stats.active_its_sessions }})
                     </h3>
-                    {% if its_sessions %}
-                        <table>
-                            <thead>
-                                <tr>
-                                    <th>User ID</th>
-                                    <th>Login Time</th>
-                                    <th>Actions</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                                {% for session in its_sessions %}
-                                <tr>
-                                    <td>{{ session.user_id }}</td>
-                                    <td>{{ session.login_time_formatted }}</td>
-                                    <td>
-                                        <form method="POST" action="{{ url_for('admin_kick_session') }}" style="display: inline;">
-                                            <input type="hidden" name="session_token" value="{{ session.session_token }}">
-                                            <button type="submit" class="btn btn-danger btn-sm" 
-                                                    onclick="return confirm('Kick this session?')">
-                                                <i class="fas fa-user-times"></i> Kick
-                                            </button>
-                                        </form>
-                                        <form method="POST" action="{{ url_for('admin_force_login') }}" style="display: inline;">
-                                            <input type="hidden" name="user_id" value="{{ session.user_id }}">
-                                            <input type="hidden" name="user_type" value="its">
-                                            <button type="submit" class="btn btn-warning btn-sm" 
-                                                    onclick="return confirm('Force-logout ALL sessions for ITS user {{ session.user_id }}?')">
-                                                <i class="fas fa-exclamation-triangle"></i> Force
-                                            </button>
-                                        </form>
-                                    </td>
-                                </tr>
-                                {% endfor %}
-                            </tbody>
-                        </table>
-                    {% else %}
-                        <p>No active ITS sessions</p>
-                    {% endif %}
+                    <div class="form-group">
+                        <input type="text" class="list-search" data-list="its-session-list" maxlength="8"
+                               placeholder="Search by user ID prefix...">
+                    </div>
+                    <table>
+                        <thead>
+                            <tr>
+                                <th>User ID</th>
+                                <th>Login Time</th>
+                                <th>Actions</th>
+                            </tr>
+                        </thead>
+                        <tbody class="lazy-list" id="its-session-list" data-kind="sessions" data-user-type="its"
+                               data-url="{{ url_for('admin_api_sessions', user_type='its') }}"></tbody>
+                    </table>
+                    <button type="button" class="btn btn-sm load-more" data-list="its-session-list">Load more</button>
                 </div>
 
                 <div class="card">
                     <h3 class="card-title">
-                        <i class="fas fa-crown"></i> Active Majlis Sessions ({{ majlis_sessions|length }})
+                        <i class="fas fa-crown"></i> Active Majlis Sessions ({{ stats.active_majlis_sessions }})
                     </h3>
-                    {% if majlis_sessions %}
-                        <table>
-                            <thead>
-                                <tr>
-                                    <th>User ID</th>
-                                    <th>Login Time</th>
-                                    <th>Actions</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                                {% for session in majlis_sessions %}
-                                <tr>
-                                    <td>{{ session.user_id }}</td>
-                                    <td>{{ session.login_time_formatted }}</td>
-                                    <td>
-                                        <form method="POST" action="{{ url_for('admin_kick_session') }}" style="display: inline;">
-                                            <input type="hidden" name="session_token" value="{{ session.session_token }}">
-                                            <button type="submit" class="btn btn-danger btn-sm" 
-                                                    onclick="return confirm('Kick this session?')">
-                                                <i class="fas fa-user-times"></i> Kick
-                                            </button>
-                                        </form>
-                                        <form method="POST" action="{{ url_for('admin_force_login') }}" style="display: inline;">
-                                            <input type="hidden" name="user_id" value="{{ session.user_id }}">
-                                            <input type="hidden" name="user_type" value="majlis">
-                                            <button type="submit" class="btn btn-warning btn-sm" 
-                                                    onclick="return confirm('Force-logout ALL sessions for Majlis user {{ session.user_id }}?')">
-                                                <i class="fas fa-exclamation-triangle"></i> Force
-                                            </button>
-                                        </form>
-                                    </td>
-                                </tr>
-                                {% endfor %}
-                            </tbody>
-                        </table>
-                    {% else %}
-                        <p>No active Majlis sessions</p>
-                    {% endif %}
+                    <div class="form-group">
+                        <input type="text" class="list-search" data-list="majlis-session-list" maxlength="8"
+                               placeholder="Search by user ID prefix...">
+                    </div>
+                    <table>
+                        <thead>
+                            <tr>
+                                <th>User ID</th>
+                                <th>Login Time</th>
+                                <th>Actions</th>
+                            </tr>
+                        </thead>
+                        <tbody class="lazy-list" id="majlis-session-list" data-kind="sessions" data-user-type="majlis"
+                               data-url="{{ url_for('admin_api_sessions', user_type='majlis') }}"></tbody>
+                    </table>
+                    <button type="button" class="btn btn-sm load-more" data-list="majlis-session-list">Load more</button>
                 </div>
             </div>
         </div>
@@ -5714,11 +7058,395 @@ ADMIN_DASHBOARD_TEMPLATE = '''<!DOCTYPE html>
             
             document.getElementById(tabId).classList.add('active');
             event.target.classList.add('active');
+            loadVisibleLists(tabId);
+        }
+
+        // Lazily paged ID and session lists
+        const listState = {};
+        const deleteActions = {
+            its: { url: "{{ url_for('admin_delete_its') }}", field: 'its_id', label: 'Asbaq' },
+            majlis: { url: "{{ url_for('admin_delete_majlis') }}", field: 'majlis_id', label: 'Majlis' }
+        };
+
+        function postButton(action, fields, html, btnClass, confirmText) {
+            const form = document.createElement('form');
+            form.method = 'POST';
+            form.action = action;
+            form.style.display = 'inline';
+            Object.entries(fields).forEach(([name, value]) => {
+                const input = document.createElement('input');
+                input.type = 'hidden';
+                input.name = name;
+                input.value = value;
+                form.appendChild(input);
+            });
+            const button = document.createElement('button');
+            button.type = 'submit';
+            button.className = 'btn ' + btnClass + ' btn-sm';
+            button.innerHTML = html;
+            button.onclick = () => confirm(confirmText);
+            form.appendChild(button);
+            return form;
+        }
+
+        function renderId(list, id) {
+            const action = deleteActions[list.dataset.userType];
+            const item = document.createElement('div');
+            item.className = 'id-item';
+            const label = document.createElement('span');
+            label.textContent = id;
+            item.appendChild(label);
+            item.appendChild(postButton(action.url, { [action.field]: id }, '<i class="fas fa-trash"></i>',
+                                        'btn-danger', 'Delete ' + action.label + ' ID ' + id + '?'));
+            list.appendChild(item);
+        }
+
+        function renderSession(list, session) {
+            const userType = list.dataset.userType;
+            const row = document.createElement('tr');
+            [session.user_id, session.login_time_formatted].forEach(value => {
+                const cell = document.createElement('td');
+                cell.textContent = value;
+                row.appendChild(cell);
+            });
+            const actions = document.createElement('td');
+            actions.appendChild(postButton("{{ url_for('admin_kick_session') }}", { session_token: session.session_token },
+                                           '<i class="fas fa-user-times"></i> Kick', 'btn-danger', 'Kick this session?'));
+            actions.appendChild(postButton("{{ url_for('admin_force_login') }}", { user_id: session.user_id, user_type: userType },
+                                           '<i class="fas fa-exclamation-triangle"></i> Force', 'btn-warning',
+                                           'Force-logout ALL sessions for ' + (userType === 'its' ? 'ITS' : 'Majlis') + ' user ' + session.user_id + '?'));
+            row.appendChild(actions);
+            list.appendChild(row);
+        }
+
+        function getListState(listId) {
+            return listState[listId] || (listState[listId] = { cursor: '0', query: '', done: false, seq: 0 });
+        }
+
+        async function loadList(listId, reset) {
+            const list = document.getElementById(listId);
+            const state = getListState(listId);
+            if (reset) {
+                state.cursor = '0';
+                state.done = false;
+                state.seq += 1;
+                list.innerHTML = '';
+            }
+            if (state.done) return;
+            const seq = state.seq;
+            const params = new URLSearchParams({ cursor: state.cursor, q: state.query, limit: 100 });
+            try {
+                const response = await fetch(list.dataset.url + '?' + params, { credentials: 'same-origin' });
+                const data = await response.json();
+                if (seq !== state.seq) return;  // superseded by a newer search
+                if (!response.ok) throw new Error(data.error || response.status);
+                data.items.forEach(item => list.dataset.kind === 'sessions' ? renderSession(list, item) : renderId(list, item));
+                state.cursor = data.next_cursor || '0';
+                state.done = !data.next_cursor;
+                document.querySelector('.load-more[data-list="' + listId + '"]').style.display = state.done ? 'none' : '';
+                if (!state.done && data.items.length === 0) return loadList(listId, false);
+                if (state.done && !list.children.length) {
+                    list.innerHTML = list.dataset.kind === 'sessions'
+                        ? '<tr><td colspan="3">No active sessions</td></tr>'
+                        : '<p>No IDs found</p>';
+                }
+            } catch (error) {
+                console.error('Error loading ' + listId + ':', error);
+            }
+        }
+
+        function loadVisibleLists(tabId) {
+            document.querySelectorAll('#' + tabId + ' .lazy-list').forEach(list => {
+                if (!listState[list.id]) loadList(list.id, true);
+            });
         }
+
+        document.querySelectorAll('.load-more').forEach(button => {
+            button.addEventListener('click', () => loadList(button.dataset.list, false));
+        });
+
+        document.querySelectorAll('.list-search').forEach(input => {
+            let timer;
+            input.addEventListener('input', () => {
+                clearTimeout(timer);
+                timer = setTimeout(() => {
+                    getListState(input.dataset.list).query = input.value.trim();
+                    loadList(input.dataset.list, true);
+                }, 250);
+            });
+        });
+
+        loadVisibleLists(document.querySelector('.tab-content.active').id);
     </script>
 </body>
 </html>'''
 
+# Template registry: every page template is compiled once at startup.
+# render_template() accepts compiled Template objects, so requests skip
+# re-lexing (or re-hashing) the large template strings above.
+TEMPLATE_SOURCES = {
+    'login': LOGIN_TEMPLATE,
+    'webinar': WEBINAR_TEMPLATE_IMPROVED,
+    'no_webinar': NO_WEBINAR_TEMPLATE,
+    'role_selection': ROLE_SELECTION_TEMPLATE,
+    'admin_login': ADMIN_LOGIN_TEMPLATE,
+    'admin_dashboard': ADMIN_DASHBOARD_TEMPLATE
+}
+COMPILED_TEMPLATES = {name: app.jinja_env.from_string(source) for name, source in TEMPLATE_SOURCES.items()}
+# Changes whenever any template changes, i.e. on every deploy that touches one
+TEMPLATE_VERSION = hashlib.sha256(''.join(TEMPLATE_SOURCES.values()).encode()).hexdigest()[:16]
+
+def render_page(name, **context):
+    """Render a page from its precompiled template"""
+    return render_template(COMPILED_TEMPLATES[name], **context)
+
+# Pre-rendered page shells
+# The webinar and no-webinar pages carry no per-user values (the user ID is
+# filled in client-side from /api/status), so each distinct settings payload
+# is rendered and gzip/brotli-compressed once and served to every viewer.
+PAGE_SHELL_CACHE_SIZE = 16
+page_shells = OrderedDict()
+page_shells_lock = threading.Lock()
+
+def _page_fingerprint(name, context):
+    """Stable hash of a page name and the settings payload it is rendered with"""
+    return hashlib.sha256(json.dumps([name, context], sort_keys=True, default=str).encode()).hexdigest()
+
+def get_page_shell(name, **context):
+    """Return the rendered, pre-compressed shell of a page for a settings payload"""
+    fingerprint = _page_fingerprint(name, context)
+    with page_shells_lock:
+        shell = page_shells.get(fingerprint)
+        if shell:
+            page_shells.move_to_end(fingerprint)
+            return shell
+    
+    body = render_page(name, **context).encode('utf-8')
+    shell = {
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9)
+    }
+    if brotli:
+        shell['br'] = brotli.compress(body, quality=11)
+    
+    with page_shells_lock:
+        page_shells[fingerprint] = shell
+        while len(page_shells) > PAGE_SHELL_CACHE_SIZE:
+            page_shells.popitem(last=False)
+    return shell
+
+def page_etag(name, user_id, context):
+    """Weak ETag of a page from the template version, settings payload and user"""
+    return hashlib.sha256(f"{TEMPLATE_VERSION}:{_page_fingerprint(name, context)}:{user_id or ''}".encode()).hexdigest()[:32]
+
+def not_modified_response(etag):
+    """Empty 304 answer for a conditional request that matched"""
+    response = make_response('', 304)
+    response.set_etag(etag, weak=True)
+    return response
+
+def page_shell_response(name, user_id=None, **context):
+    """Serve a page shell in the best encoding the client accepts.
+
+    Answers 304 from If-None-Match before anything is rendered, so reconnect
+    storms where every viewer reloads at once cost headers only.
+    """
+    etag = page_etag(name, user_id, context)
+    if request.if_none_match.contains_weak(etag):
+        return not_modified_response(etag)
+    
+    shell = get_page_shell(name, **context)
+    encoding = request.accept_encodings.best_match([e for e in ('br', 'gzip') if e in shell]) or 'identity'
+    
+    response = make_response(shell[encoding])
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding, Cookie'
+    response.set_etag(etag, weak=True)
+    return response
+
+@app.cli.command('benchmark-templates')
+@click.option('--iterations', default=200, show_default=True, help='Renders per template and method')
+def benchmark_templates_command(iterations):
+    """Compare per-request render cost of render_template_string vs precompiled templates"""
+    context = {
+        'its_id': '12345678',
+        'user_id': '12345678',
+        'session_token': 'x' * 43,
+        'stats': {'total_its': 0, 'total_majlis': 0, 'active_its_sessions': 0,
+                  'active_majlis_sessions': 0, 'total_sessions': 0},
+        'its_settings': {}, 'majlis_settings': {}
+    }
+    context.update(_load_its_settings_from_db())
+    
+    with app.test_request_context('/'):
+        for name, source in TEMPLATE_SOURCES.items():
+            started = time.perf_counter()
+            for _ in range(iterations):
+                render_template_string(source, **context)
+            string_ms = (time.perf_counter() - started) * 1000 / iterations
+            
+            started = time.perf_counter()
+            for _ in range(iterations):
+                render_page(name, **context)
+            compiled_ms = (time.perf_counter() - started) * 1000 / iterations
+            
+            print(f"{name:<16} {len(source) / 1024:6.1f} KB  "
+                  f"render_template_string: {string_ms:7.3f} ms  precompiled: {compiled_ms:7.3f} ms")
+
+# Admin credentials
+# scrypt cost: 2^14 x 8 x 1 uses 16 MB and ~50 ms per verification
+ADMIN_SCRYPT_N = 2 ** 14
+ADMIN_SCRYPT_R = 8
+ADMIN_SCRYPT_P = 1
+# Seconds before the in-memory credentials are re-read, catching direct DB edits
+ADMIN_CREDENTIAL_CACHE_TTL = int(os.environ.get('ADMIN_CREDENTIAL_CACHE_TTL', '300'))
+# Seconds a successful admin password verification is remembered per username
+ADMIN_LOGIN_CACHE_TTL = int(os.environ.get('ADMIN_LOGIN_CACHE_TTL', '900'))
+ADMIN_CREDENTIALS_CHANNEL = 'admin_credentials'
+
+# username -> password hash, plus when it was loaded
+admin_credentials = {'hashes': {}, 'loaded_at': None}
+# username -> (HMAC of the verified password, password hash it matched, expiry)
+admin_login_cache = {}
+admin_login_cache_lock = threading.Lock()
+# Per-process key for the verified-login cache; never leaves this worker
+ADMIN_LOGIN_CACHE_KEY = secrets.token_bytes(32)
+# Verified against for unknown usernames so they cost the same scrypt as a
+# wrong password; no password derives an all-zero key
+ADMIN_DUMMY_HASH = f"scrypt${ADMIN_SCRYPT_N}${ADMIN_SCRYPT_R}${ADMIN_SCRYPT_P}${'00' * 16}${'00' * 64}"
+admin_credentials_reloading = threading.Event()
+
+def hash_admin_password(password):
+    """scrypt hash in the form scrypt$n$r$p$salt$hash"""
+    salt = secrets.token_bytes(16)
+    derived = hashlib.scrypt(password.encode(), salt=salt, n=ADMIN_SCRYPT_N, r=ADMIN_SCRYPT_R, p=ADMIN_SCRYPT_P)
+    return f"scrypt${ADMIN_SCRYPT_N}${ADMIN_SCRYPT_R}${ADMIN_SCRYPT_P}${salt.hex()}${derived.hex()}"
+
+def verify_admin_password(password, stored_hash):
+    """Return (matches, needs_upgrade) for a scrypt or legacy SHA-256 hash"""
+    if stored_hash.startswith('scrypt$'):
+        _, n, r, p, salt, expected = stored_hash.split('$')
+        derived = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p))
+        return hmac.compare_digest(derived.hex(), expected), False
+    # Legacy unsalted SHA-256 from before the KDF; upgraded on first good login
+    matches = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored_hash)
+    return matches, matches
+
+def load_admin_credentials():
+    """Read all admin credentials into memory (there are only a handful)"""
+    if has_app_context():
+        hashes = {admin.username: admin.password_hash for admin in AdminCredential.query.all()}
+    else:
+        # Called from the pub/sub listener thread
+        with app.app_context():
+            hashes = {admin.username: admin.password_hash for admin in AdminCredential.query.all()}
+    admin_credentials['hashes'] = hashes
+    admin_credentials['loaded_at'] = time.monotonic()
+    with admin_login_cache_lock:
+        # Drop verified logins whose hash changed or whose user is gone
+        for username in list(admin_login_cache):
+            if admin_login_cache[username][1] != hashes.get(username):
+                del admin_login_cache[username]
+
+def _reload_admin_credentials():
+    try:
+        load_admin_credentials()
+    except Exception as e:
+        print(f"Error reloading admin credentials: {e}")
+    finally:
+        admin_credentials_reloading.clear()
+
+def get_admin_password_hash(username):
+    """Password hash of an admin from memory.
+
+    Only the very first lookup waits for the database; once the copy is
+    stale it keeps being served while one background thread reloads it.
+    """
+    loaded_at = admin_credentials['loaded_at']
+    if loaded_at is None:
+        load_admin_credentials()
+    elif (time.monotonic() - loaded_at > ADMIN_CREDENTIAL_CACHE_TTL
+            and not admin_credentials_reloading.is_set()):
+        admin_credentials_reloading.set()
+        threading.Thread(target=_reload_admin_credentials, daemon=True).start()
+    return admin_credentials['hashes'].get(username)
+
+def _apply_admin_credentials_message(message):
+    # Off the shared listener thread: a cold database must not hold up
+    # session invalidations and broadcasts queued behind this message
+    threading.Thread(target=_reload_admin_credentials, daemon=True).start()
+
+def publish_admin_credentials_changed():
+    """Reload credentials here and tell every other worker to do the same"""
+    load_admin_credentials()
+    try:
+        redis_client.publish(ADMIN_CREDENTIALS_CHANNEL, json.dumps({'changed': True}))
+    except Exception as e:
+        print(f"Error publishing admin credential change: {e}")
+
+WORKER_MESSAGE_HANDLERS[ADMIN_CREDENTIALS_CHANNEL] = _apply_admin_credentials_message
+
+def set_admin_password(username, password):
+    """Create or update an admin with a freshly hashed password"""
+    admin = AdminCredential.query.get(username)
+    if not admin:
+        admin = AdminCredential(username=username)
+        db.session.add(admin)
+    admin.password_hash = hash_admin_password(password)
+    db.session.commit()
+    publish_admin_credentials_changed()
+
+def _login_cache_digest(username, password):
+    return hmac.new(ADMIN_LOGIN_CACHE_KEY, f"{username}\0{password}".encode(), hashlib.sha256).digest()
+
+def authenticate_admin(username, password):
+    """Check admin credentials without touching the database.
+
+    A username's last successful verification is remembered as a keyed
+    HMAC for ADMIN_LOGIN_CACHE_TTL, so repeat logins skip scrypt. Wrong
+    passwords never match that entry and always pay for the full KDF, and
+    the entry is dropped as soon as the stored hash changes.
+    """
+    stored_hash = get_admin_password_hash(username)
+    if not stored_hash:
+        # Same scrypt cost as a wrong password, so timing does not reveal usernames
+        verify_admin_password(password, ADMIN_DUMMY_HASH)
+        return False
+    
+    digest = _login_cache_digest(username, password)
+    with admin_login_cache_lock:
+        cached = admin_login_cache.get(username)
+    if (cached and cached[1] == stored_hash and cached[2] > time.monotonic()
+            and hmac.compare_digest(cached[0], digest)):
+        return True
+    
+    matches, needs_upgrade = verify_admin_password(password, stored_hash)
+    if not matches:
+        return False
+    
+    if needs_upgrade:
+        try:
+            set_admin_password(username, password)
+            stored_hash = admin_credentials['hashes'].get(username, stored_hash)
+            print(f"Upgraded password hash of admin {username} to scrypt")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error upgrading admin password hash: {e}")
+    
+    with admin_login_cache_lock:
+        admin_login_cache[username] = (digest, stored_hash, time.monotonic() + ADMIN_LOGIN_CACHE_TTL)
+    return True
+
+@app.cli.command('set-admin-password')
+@click.argument('username')
+@click.password_option()
+def set_admin_password_command(username, password):
+    """Create an admin or change its password (stored as scrypt)"""
+    set_admin_password(username, password)
+    print(f"Password set for admin {username}")
+
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
     """Admin login route"""
@@ -5729,22 +7457,25 @@ def admin_login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
         
+        # Throttle before the credential lookup
+        allowed, retry_after = check_rate_limits('admin_login', [
+            (f'ip:{request.remote_addr}', ADMIN_LOGIN_RATE_LIMIT_IP),
+            (f'user:{username.lower()}', ADMIN_LOGIN_RATE_LIMIT_USER)
+        ])
+        if not allowed:
+            return rate_limited_response('admin_login', retry_after)
+        
         try:
-            admin = AdminCredential.query.filter_by(username=username).first()
-            if not admin:
-                return render_template_string(ADMIN_LOGIN_TEMPLATE, error="Invalid username or password.")
-            
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            if password_hash == admin.password_hash:
+            if authenticate_admin(username, password):
                 session['admin_logged_in'] = True
                 return redirect(url_for('admin_dashboard'))
             else:
-                return render_template_string(ADMIN_LOGIN_TEMPLATE, error="Invalid username or password.")
+                return render_page('admin_login', error="Invalid username or password.")
         except Exception as e:
             print(f"Error in admin login: {e}")
-            return render_template_string(ADMIN_LOGIN_TEMPLATE, error="An error occurred during login. Please try again.")
+            return render_page('admin_login', error="An error occurred during login. Please try again.")
     
-    return render_template_string(ADMIN_LOGIN_TEMPLATE)
+    return render_page('admin_login')
 
 @app.route('/admin/logout')
 def admin_logout():
@@ -5774,7 +7505,7 @@ def admin_add_its():
         db.session.commit()
 
         # Update Redis cache
-        redis_client.sadd('cached:its_ids', its_id)
+        allowlist_add('its', [its_id])
 
         return redirect(url_for('admin_dashboard') + '?message=ITS ID added successfully&type=success')
     except Exception as e:
@@ -5829,6 +7560,9 @@ def admin_update_webinar_settings():
         
         db.session.commit()
         
+        # Update Redis cache and notify ITS viewers
+        write_through_settings('its', settings)
+        
         return redirect(url_for('admin_dashboard') + '?message=Webinar settings updated successfully&type=success')
     
     except Exception as e:
@@ -5847,52 +7581,27 @@ def admin_index():
 def admin_dashboard():
     """Enhanced admin dashboard route with dual user support"""
     try:
-        # Fetch ITS and Majlis IDs from cache
-        its_ids = load_its_ids()
-        majlis_ids = load_majlis_ids()
-        
-        # Get active sessions from Redis
-        all_sessions = get_all_sessions()
-        
         # Get webinar settings for both types
         its_settings = load_webinar_settings()
         majlis_settings = load_majlis_webinar_settings()
         
-        # Process sessions data
-        its_sessions = []
-        majlis_sessions = []
-        
-        for token, session_data in all_sessions.items():
-            formatted_session = {
-                'user_id': session_data['user_id'],
-                'login_time_formatted': datetime.fromisoformat(session_data['login_time']).strftime('%Y-%m-%d %H:%M:%S'),
-                'session_token': token,
-                'user_type': session_data.get('user_type', 'its')
-            }
-            
-            if session_data.get('user_type') == 'majlis':
-                majlis_sessions.append(formatted_session)
-            else:
-                its_sessions.append(formatted_session)
-        
-        # Prepare stats
+        # Prepare stats (ID and session lists are paged in by the dashboard
+        # from /admin/api/ids and /admin/api/sessions)
+        id_counts = get_id_counts()
+        session_counts = get_active_session_counts()
         stats = {
-            'total_its': len(its_ids),
-            'total_majlis': len(majlis_ids),
-            'active_its_sessions': len(its_sessions),
-            'active_majlis_sessions': len(majlis_sessions),
-            'total_sessions': len(all_sessions)
+            'total_its': id_counts['its'],
+            'total_majlis': id_counts['majlis'],
+            'active_its_sessions': session_counts['its'],
+            'active_majlis_sessions': session_counts['majlis'],
+            'total_sessions': session_counts['its'] + session_counts['majlis']
         }
         
         message = request.args.get('message', '')
         message_type = request.args.get('type', 'success')
         
-        return render_template_string(ADMIN_DASHBOARD_TEMPLATE, 
+        return render_page('admin_dashboard', 
                                   stats=stats,
-                                  its_ids=sorted(its_ids),
-                                  majlis_ids=sorted(majlis_ids),
-                                  its_sessions=its_sessions,
-                                  majlis_sessions=majlis_sessions,
                                   message=message,
                                   message_type=message_type,
                                   its_settings=its_settings,
@@ -5911,35 +7620,14 @@ def admin_add_bulk_its():
         return redirect(url_for('admin_dashboard') + '?message=No ITS IDs provided&type=error')
     
     try:
-        # Get existing IDS IDs
-        existing_ids = {its_id.id for its_id in ItsID.query.all()}
-        new_ids = set()
+        counts = bulk_import_ids('its', iter_id_tokens(bulk_its.splitlines()))
         
-        # Split by lines or commas and validate each ID
-        for line in bulk_its.splitlines():
-            for its_id in line.split(','):
-                its_id = its_id.strip()
-                if len(its_id) == 8 and its_id.isdigit() and its_id not in existing_ids:
-                    new_ids.add(its_id)
+        if not counts['accepted']:
+            return redirect(url_for('admin_dashboard') + f"?message=No valid ITS IDs to add ({counts['duplicate']} already present, {counts['invalid']} invalid)&type=error")
         
-        if not new_ids:
-            return redirect(url_for('admin_dashboard') + '?message=No valid ITS IDs to add&type=error')
-        
-        # Add new ITS IDs to database
-        for its_id in new_ids:
-            new_id = ItsID(id=its_id)
-            db.session.add(new_id)
-
-        db.session.commit()
-
-        # Update Redis cache for all new IDs
-        if new_ids:
-            redis_client.sadd('cached:its_ids', *new_ids)
-
-        return redirect(url_for('admin_dashboard') + f'?message=Added {len(new_ids)} ITS IDs successfully&type=success')
+        return redirect(url_for('admin_dashboard') + f"?message={describe_import('ITS', counts)}&type=success")
     
     except Exception as e:
-        db.session.rollback()
         print(f"Error adding bulk ITS IDs: {e}")
         return redirect(url_for('admin_dashboard') + f'?message=Error adding ITS IDs: {str(e)}&type=error')
 
@@ -5966,7 +7654,7 @@ def admin_delete_its():
         db.session.commit()
 
         # Remove from Redis cache
-        redis_client.srem('cached:its_ids', its_id)
+        allowlist_remove('its', [its_id])
 
         return redirect(url_for('admin_dashboard') + '?message=ITS ID deleted successfully&type=success')
     except Exception as e:
@@ -5984,7 +7672,7 @@ def admin_delete_all_its():
         db.session.commit()
         
         # Clear Redis cache
-        redis_client.delete('cached:its_ids')
+        allowlist_clear('its')
         
         return redirect(url_for('admin_dashboard') + '?message=All ITS IDs deleted successfully&type=success')
     except Exception as e:
@@ -6045,27 +7733,50 @@ def admin_add_bulk_majlis():
         return redirect(url_for('admin_dashboard') + '?message=Please enter Majlis IDs&type=error')
     
     # Parse IDs (comma, space, or newline separated)
-    import re
-    majlis_ids = re.split(r'[,\s\n]+', bulk_majlis_ids)
-    majlis_ids = [mid.strip() for mid in majlis_ids if mid.strip()]
+    try:
+        counts = bulk_import_ids('majlis', iter_id_tokens(bulk_majlis_ids.splitlines()))
+    except Exception as e:
+        print(f"Error adding bulk Majlis IDs: {e}")
+        return redirect(url_for('admin_dashboard') + f'?message=Error adding Majlis IDs: {str(e)}&type=error')
     
-    success_count = 0
-    error_count = 0
+    if not counts['accepted']:
+        return redirect(url_for('admin_dashboard') + f"?message=No valid Majlis IDs to add ({counts['duplicate']} already present, {counts['invalid']} invalid)&type=error")
     
-    for majlis_id in majlis_ids:
-        if len(majlis_id) == 8 and majlis_id.isdigit():
-            if save_majlis_id(majlis_id):
-                success_count += 1
-            else:
-                error_count += 1
-        else:
-            error_count += 1
+    return redirect(url_for('admin_dashboard') + f"?message={describe_import('Majlis', counts)}&type=success")
+
+def _import_uploaded_ids(user_type, label):
+    """Shared handler for the ID file upload forms"""
+    upload = request.files.get('id_file')
+    if not upload or not upload.filename:
+        return redirect(url_for('admin_dashboard') + f'?message=Please choose a file of {label} IDs&type=error')
     
-    message = f'Added {success_count} Majlis IDs successfully'
-    if error_count > 0:
-        message += f', {error_count} failed'
+    try:
+        counts = bulk_import_ids(user_type, iter_uploaded_id_tokens(upload))
+    except Exception as e:
+        print(f"Error uploading {label} IDs: {e}")
+        return redirect(url_for('admin_dashboard') + f'?message=Error uploading {label} IDs: {str(e)}&type=error')
     
-    return redirect(url_for('admin_dashboard') + f'?message={message}&type=success')
+    message_type = 'success' if counts['accepted'] else 'error'
+    return redirect(url_for('admin_dashboard') + f"?message={describe_import(label, counts)}&type={message_type}")
+
+@app.route('/admin/upload_its_ids', methods=['POST'])
+@admin_required
+def admin_upload_its_ids():
+    """Add ITS IDs from an uploaded CSV/text/XLSX file"""
+    return _import_uploaded_ids('its', 'ITS')
+
+@app.route('/admin/upload_majlis_ids', methods=['POST'])
+@admin_required
+def admin_upload_majlis_ids():
+    """Add Majlis IDs from an uploaded CSV/text/XLSX file"""
+    return _import_uploaded_ids('majlis', 'Majlis')
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Send oversized ID uploads back to the dashboard with an error"""
+    if request.path.startswith('/admin/upload_'):
+        return redirect(url_for('admin_dashboard') + f'?message=File too large (limit {MAX_UPLOAD_MB} MB)&type=error')
+    return e
 
 @app.route('/admin/delete_all_majlis', methods=['POST'])
 @admin_required
@@ -6077,7 +7788,7 @@ def admin_delete_all_majlis():
         db.session.commit()
         
         # Clear Redis cache
-        redis_client.delete('cached:majlis_ids')
+        allowlist_clear('majlis')
         
         return redirect(url_for('admin_dashboard') + '?message=All Majlis IDs deleted successfully&type=success')
     except Exception as e:
@@ -6136,8 +7847,8 @@ def admin_update_majlis_settings():
         
         db.session.commit()
         
-        # Update Redis cache
-        refresh_redis_cache()
+        # Update Redis cache and notify Majlis viewers
+        write_through_settings('majlis', settings)
         
         return redirect(url_for('admin_dashboard') + '?message=Majlis webinar settings updated successfully&type=success')
     except Exception as e:
@@ -6165,6 +7876,179 @@ def admin_refresh_cache():
         print(f"Error refreshing cache: {e}")
         return redirect(url_for('admin_dashboard') + f'?message=Error refreshing cache: {str(e)}&type=error')
 
+@app.route('/admin/rebuild_session_index', methods=['POST'])
+@admin_required
+def admin_rebuild_session_index():
+    """Rebuild the per-user session index from the live sessions"""
+    user_count = rebuild_user_session_index()
+    if user_count is not None:
+        return redirect(url_for('admin_dashboard') + f'?message=Session index rebuilt for {user_count} users&type=success')
+    else:
+        return redirect(url_for('admin_dashboard') + '?message=Error rebuilding session index&type=error')
+
+@app.cli.command('refresh-cache')
+@click.option('--diff', is_flag=True, help='Apply SADD/SREM against the current sets instead of swapping.')
+@click.option('--chunk-size', default=None, type=int, help='IDs per Redis command.')
+def refresh_cache_command(diff, chunk_size):
+    """Refresh the cached ID sets from the database"""
+    started = time.perf_counter()
+    stats = refresh_id_sets('diff' if diff else 'swap', chunk_size)
+    elapsed = time.perf_counter() - started
+    for user_type, result in stats.items():
+        click.echo(f"{user_type}: {result}")
+    click.echo(f"Refreshed in {elapsed:.2f}s")
+
+@app.cli.command('rebuild-session-index')
+def rebuild_session_index_command():
+    """Rebuild the per-user session index (flask rebuild-session-index)"""
+    user_count = rebuild_user_session_index()
+    if user_count is None:
+        raise SystemExit(1)
+
+def _admin_page_args():
+    """Parse cursor / q / limit query parameters for the listing endpoints"""
+    cursor = request.args.get('cursor', '0')
+    prefix = request.args.get('q', '').strip()
+    limit = request.args.get('limit', ADMIN_PAGE_SIZE, type=int)
+    if not cursor.isdigit() or (prefix and not prefix.isdigit()) or len(prefix) > 8:
+        return None
+    return int(cursor), prefix, max(1, min(limit, ADMIN_PAGE_MAX))
+
+@app.route('/admin/api/ids/<user_type>')
+@admin_required
+def admin_api_ids(user_type):
+    """Page through cached ITS or Majlis IDs, optionally by ID prefix"""
+    args = _admin_page_args()
+    if user_type not in USER_TYPES or args is None:
+        return jsonify({'error': 'Invalid listing request'}), 400
+    
+    try:
+        ids, next_cursor = scan_id_page(user_type, *args)
+        return jsonify({
+            'items': ids,
+            'next_cursor': str(next_cursor) if next_cursor else None,
+            'total': get_id_counts()[user_type]
+        })
+    except Exception as e:
+        print(f"Error listing {user_type} IDs: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/sessions/<user_type>')
+@admin_required
+def admin_api_sessions(user_type):
+    """Page through live sessions of one user type, optionally by ID prefix"""
+    args = _admin_page_args()
+    if user_type not in USER_TYPES or args is None:
+        return jsonify({'error': 'Invalid listing request'}), 400
+    
+    try:
+        sessions, next_cursor = scan_session_page(user_type, *args)
+        return jsonify({
+            'items': sessions,
+            'next_cursor': str(next_cursor) if next_cursor else None,
+            'total': get_active_session_counts()[user_type]
+        })
+    except Exception as e:
+        print(f"Error listing {user_type} sessions: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/allowlist_filter_stats')
+@admin_required
+def admin_allowlist_filter_stats():
+    """Size, fill and false-positive figures of this worker's allow-list filter"""
+    return jsonify(allowlist_filter.stats())
+
+@app.route('/admin/api/session_cache_stats')
+@admin_required
+def admin_session_cache_stats():
+    """Hit/miss counters of this worker's verified-session cache"""
+    return jsonify(session_cache.stats())
+
+@app.cli.command('benchmark-session-scan')
+@click.option('--batch-size', default=SESSION_SCAN_BATCH, show_default=True, help='Keys per SCAN/pipeline batch')
+def benchmark_session_scan_command(batch_size):
+    """Walk all sessions and report round trips and time per 10k sessions"""
+    stats = {'round_trips': 0}
+    session_count = 0
+    started = time.perf_counter()
+    for batch in iter_session_batches(batch_size, stats):
+        session_count += len(batch)
+    elapsed = time.perf_counter() - started
+    
+    per_10k = 10000 / session_count if session_count else 0
+    print(f"Sessions: {session_count}, batch size: {batch_size}")
+    print(f"SCAN + pipelined HGETALL: {stats['round_trips']} round trips, {elapsed * 1000:.1f} ms "
+          f"(~{stats['round_trips'] * per_10k:.0f} round trips per 10k sessions)")
+    print(f"Previous KEYS + GET per key: {session_count + 1} round trips "
+          f"(~{10001 if session_count else 0} per 10k sessions)")
+
+def _memory_usage(keys):
+    """Total MEMORY USAGE of keys in bytes, or None if the server lacks it"""
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key, samples=0)
+    try:
+        return sum(usage or 0 for usage in pipe.execute())
+    except redis.exceptions.ResponseError:
+        return None
+
+@app.cli.command('benchmark-allowlist')
+@click.option('--ids', 'sizes', multiple=True, type=int, default=[100000, 1000000], show_default=True,
+              help='Number of IDs to load (repeatable)')
+@click.option('--spread', type=click.Choice(['uniform', 'clustered']), default='uniform', show_default=True,
+              help='uniform: random over 10000000-99999999; clustered: consecutive IDs from 20000000')
+def benchmark_allowlist_command(sizes, spread):
+    """Compare Redis memory of the set and bitmap allow-list backends"""
+    import random
+    set_key = 'benchmark:allowlist:set'
+    bits_prefix = 'benchmark:allowlist:bits'
+    
+    for size in sizes:
+        if spread == 'uniform':
+            numbers = random.sample(range(10000000, 100000000), size)
+        else:
+            numbers = range(20000000, 20000000 + size)
+        
+        shard_keys = set()
+        for start in range(0, size, CACHE_REFRESH_CHUNK):
+            chunk = numbers[start:start + CACHE_REFRESH_CHUNK]
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.sadd(set_key, *[str(number) for number in chunk])
+            for number in chunk:
+                shard_key = f'{bits_prefix}:{number // ALLOWLIST_SHARD_BITS}'
+                pipe.setbit(shard_key, number % ALLOWLIST_SHARD_BITS, 1)
+                shard_keys.add(shard_key)
+            pipe.execute()
+        
+        try:
+            set_bytes = _memory_usage([set_key])
+            bitmap_bytes = _memory_usage(shard_keys)
+            if bitmap_bytes is None:
+                # Payload only; real usage adds a small per-key overhead
+                pipe = redis_client.pipeline(transaction=False)
+                for shard_key in shard_keys:
+                    pipe.strlen(shard_key)
+                bitmap_bytes = sum(pipe.execute())
+            
+            print(f"{size} IDs ({spread}):")
+            print(f"  set:    {set_bytes / 1048576:.2f} MB" if set_bytes is not None
+                  else "  set:    MEMORY USAGE not supported by this server")
+            print(f"  bitmap: {bitmap_bytes / 1048576:.2f} MB in {len(shard_keys)} shards")
+        finally:
+            redis_client.delete(set_key)
+            for start in range(0, len(shard_keys), 1000):
+                redis_client.delete(*list(shard_keys)[start:start + 1000])
+
+@app.route('/admin/api/broadcast_metrics')
+@admin_required
+def admin_broadcast_metrics():
+    """Fan-out metrics of recent admin broadcasts"""
+    try:
+        limit = min(int(request.args.get('limit', BROADCAST_METRICS_HISTORY)), BROADCAST_METRICS_HISTORY)
+    except ValueError:
+        limit = BROADCAST_METRICS_HISTORY
+    return jsonify({'broadcasts': get_broadcast_metrics(limit)})
+
 @app.route('/admin/force_login', methods=['POST'])
 @admin_required
 def admin_force_login():
@@ -6195,14 +8079,9 @@ def add_header(response):
     """Add performance and security headers to all responses"""
     # Only add caching for non-admin routes and static content
     if not request.path.startswith('/admin'):
-        if request.endpoint in ['index', 'webinar', 'majlis']:
-            # Cache HTML pages for 5 minutes
-            response.headers['Cache-Control'] = 'public, max-age=300'
-        elif request.endpoint == 'api_status':
-            # Don't cache API status
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
+        if request.endpoint in ['index', 'webinar', 'majlis', 'api_status']:
+            # Per-user responses: browser-only, always revalidated via ETag (304 when unchanged)
+            response.headers['Cache-Control'] = 'private, no-cache'
     else:
         # Never cache admin pages
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
@@ -6223,32 +8102,90 @@ def favicon():
     from flask import Response
     return Response(status=204)  # No Content - browser won't show error
 
-# Initialize database on startup (runs once when app starts)
-with app.app_context():
-    db.create_all()
-    init_database()
+# Application startup
+# Schema checks and cache warm-up run in a background thread, so importing
+# the app (and booting a worker) never waits on a cold database.
+# 'auto' reuses a warm Redis cache left by a previous worker or deploy;
+# 'always' reloads it from the database on every boot.
+STARTUP_CACHE_REFRESH = os.environ.get('STARTUP_CACHE_REFRESH', 'auto')
+STARTUP_RETRY_SECONDS = 5
+CACHE_WARM_KEY = 'cached:warm_at'
+
+startup_state = {
+    'cache': 'starting',
+    'database': 'starting',
+    'error': None,
+    'started_at': datetime.now().isoformat(),
+    'ready_at': None
+}
+
+def _mark_cache_ready(how):
+    startup_state['cache'] = 'ready'
+    startup_state['ready_at'] = datetime.now().isoformat()
+    print(f"Startup: cache ready ({how})")
+
+def warm_cache_usable():
+    """True if Redis holds allow-lists a previous boot built for this backend.
+
+    The marker alone is not enough: switching ALLOWLIST_BACKEND leaves it
+    behind for the other representation, and an eviction or FLUSHDB can drop
+    the IDs but leave the marker.
+    """
+    marker = redis_client.get(CACHE_WARM_KEY)
+    try:
+        backend = json.loads(marker).get('backend') if marker else None
+    except (ValueError, AttributeError):
+        backend = None  # Marker from before the backend was recorded
+    if backend != ALLOWLIST_BACKEND:
+        return False
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for user_type in USER_TYPES:
+        if ALLOWLIST_BACKEND == 'bitmap':
+            pipe.get(_bitmap_count_key(user_type))
+        else:
+            pipe.scard(ALLOWLIST_KEYS[user_type])
+    return any(int(count or 0) > 0 for count in pipe.execute())
+
+def is_app_ready():
+    """True once the Redis cache can answer logins"""
+    return startup_state['cache'] == 'ready'
+
+def run_startup_tasks():
+    """Check the schema and warm the Redis cache, retrying until both succeed"""
+    if STARTUP_CACHE_REFRESH != 'always':
+        try:
+            if warm_cache_usable():
+                _mark_cache_ready('reused warm Redis cache')
+        except Exception as e:
+            print(f"Error checking for a warm cache: {e}")
+    
+    while not background_stop.is_set():
+        try:
+            with app.app_context():
+                if startup_state['database'] != 'ready':
+                    init_database()
+                    startup_state['database'] = 'ready'
+                    print("Startup: database ready")
+                if not is_app_ready():
+                    if not refresh_redis_cache():
+                        raise RuntimeError('Redis cache refresh failed')
+                    _mark_cache_ready('refreshed from database')
+            startup_state['error'] = None
+            return
+        except Exception as e:
+            startup_state['error'] = str(e)
+            print(f"Error during startup, retrying in {STARTUP_RETRY_SECONDS}s: {e}")
+            background_stop.wait(STARTUP_RETRY_SECONDS)
 
 # Helper function to track user activity in Redis
 def update_user_activity(user_id, user_type):
     """Update user's last activity timestamp in Redis"""
     try:
-        activity_key = f"activity:{user_id}:{user_type}"
-        redis_client.setex(activity_key, 7200, datetime.now().isoformat())  # Store for 2 hours
+        redis_client.zadd(USER_ACTIVITY_KEY, {_activity_member(user_id, user_type): time.time()})
     except Exception as e:
         print(f"Error updating activity for {user_id}: {e}")
 
-def get_user_last_activity(user_id, user_type):
-    """Get user's last activity timestamp from Redis"""
-    try:
-        activity_key = f"activity:{user_id}:{user_type}"
-        last_activity = redis_client.get(activity_key)
-        if last_activity:
-            return datetime.fromisoformat(last_activity)
-        return None
-    except Exception as e:
-        print(f"Error getting activity for {user_id}: {e}")
-        return None
-
 # WebSocket Event Handlers
 @socketio.on('connect')
 def handle_connect():
@@ -6344,36 +8281,321 @@ def handle_heartbeat(data):
             })
             disconnect()
 
+# Admin broadcast fan-out
+# Broadcasts are published to every worker, queued there, and delivered to that
+# worker's own sockets in chunks, yielding between chunks so heartbeats keep flowing.
+BROADCAST_CHANNEL = 'admin_broadcasts'
+BROADCAST_CHUNK_SIZE = int(os.environ.get('BROADCAST_CHUNK_SIZE', '200'))
+BROADCAST_CONCURRENCY = int(os.environ.get('BROADCAST_CONCURRENCY', '2'))  # fan-out workers per process
+BROADCAST_METRICS_HISTORY = 50
+BROADCAST_METRICS_TTL = 86400  # 24 hours
+BROADCAST_TARGETS = ('all_users', 'type_its', 'type_majlis')
+
+broadcast_queue = queue.Queue()
+
+def _broadcast_metrics_key(broadcast_id):
+    """Redis hash holding the delivery metrics of one broadcast"""
+    return f'broadcast_metrics:{broadcast_id}'
+
+def queue_admin_broadcast(message, target, client=None):
+    """Record a broadcast and hand it to every worker for fan-out"""
+    client = client or redis_client
+    broadcast_id = secrets.token_hex(8)
+    job = {
+        'broadcast_id': broadcast_id,
+        'message': message,
+        'target': target,
+        'queued_at': time.time()
+    }
+    metrics_key = _broadcast_metrics_key(broadcast_id)
+    pipe = client.pipeline()
+    pipe.hset(metrics_key, mapping={'message': message, 'target': target, 'queued_at': job['queued_at']})
+    pipe.expire(metrics_key, BROADCAST_METRICS_TTL)
+    pipe.lpush('broadcast_metrics:recent', broadcast_id)
+    pipe.ltrim('broadcast_metrics:recent', 0, BROADCAST_METRICS_HISTORY - 1)
+    pipe.publish(BROADCAST_CHANNEL, json.dumps(job))
+    pipe.execute()
+    return broadcast_id
+
+def fan_out_broadcast(job):
+    """Deliver a broadcast to this worker's sockets in the target room"""
+    started = time.monotonic()
+    manager = socketio.server.manager
+    sids = [sid for sid, _ in manager.get_participants('/', job['target'])]
+    payload = {
+        'message': job['message'],
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    delivered = dropped = 0
+    for i in range(0, len(sids), BROADCAST_CHUNK_SIZE):
+        for sid in sids[i:i + BROADCAST_CHUNK_SIZE]:
+            if not manager.is_connected(sid, '/'):
+                dropped += 1
+                continue
+            try:
+                # Other workers deliver to their own sockets, so skip the message queue
+                socketio.emit('admin_message', payload, to=sid, ignore_queue=True)
+                delivered += 1
+            except Exception:
+                dropped += 1
+        socketio.sleep(0)
+    
+    elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+    latency_ms = round((time.time() - job['queued_at']) * 1000, 1)
+    metrics_key = _broadcast_metrics_key(job['broadcast_id'])
+    pipe = redis_client.pipeline()
+    pipe.hincrby(metrics_key, 'recipients', len(sids))
+    pipe.hincrby(metrics_key, 'delivered', delivered)
+    pipe.hincrby(metrics_key, 'dropped', dropped)
+    pipe.hincrby(metrics_key, 'workers', 1)
+    pipe.hset(metrics_key, mapping={f'elapsed_ms:{INSTANCE_ID}': elapsed_ms, f'latency_ms:{INSTANCE_ID}': latency_ms})
+    pipe.execute()
+    print(f"WebSocket: Admin broadcast {job['broadcast_id']} to {job['target']}: "
+          f"{delivered}/{len(sids)} delivered, {dropped} dropped in {elapsed_ms} ms")
+
+def run_broadcast_worker():
+    """Background task draining this worker's broadcast queue"""
+    while True:
+        job = broadcast_queue.get()
+        try:
+            fan_out_broadcast(job)
+        except Exception as e:
+            print(f"Error fanning out broadcast {job.get('broadcast_id')}: {e}")
+
+WORKER_MESSAGE_HANDLERS[BROADCAST_CHANNEL] = broadcast_queue.put
+
+def get_broadcast_metrics(limit=BROADCAST_METRICS_HISTORY):
+    """Summarise delivery metrics of the most recent broadcasts"""
+    broadcast_ids = redis_client.lrange('broadcast_metrics:recent', 0, limit - 1)
+    pipe = redis_client.pipeline(transaction=False)
+    for broadcast_id in broadcast_ids:
+        pipe.hgetall(_broadcast_metrics_key(broadcast_id))
+    
+    broadcasts = []
+    for broadcast_id, metrics in zip(broadcast_ids, pipe.execute()):
+        if not metrics:
+            continue
+        elapsed = [float(v) for k, v in metrics.items() if k.startswith('elapsed_ms:')]
+        latency = [float(v) for k, v in metrics.items() if k.startswith('latency_ms:')]
+        broadcasts.append({
+            'broadcast_id': broadcast_id,
+            'message': metrics.get('message'),
+            'target': metrics.get('target'),
+            'queued_at': datetime.fromtimestamp(float(metrics['queued_at'])).isoformat(),
+            'workers': int(metrics.get('workers', 0)),
+            'recipients': int(metrics.get('recipients', 0)),
+            'delivered': int(metrics.get('delivered', 0)),
+            'dropped': int(metrics.get('dropped', 0)),
+            'max_fan_out_ms': max(elapsed) if elapsed else None,
+            'max_latency_ms': max(latency) if latency else None
+        })
+    return broadcasts
+
 @socketio.on('admin_broadcast')
 def handle_admin_broadcast(data):
     """Handle admin broadcasts to users"""
-    # Verify admin session (you can add proper admin auth here)
+    if not session.get('admin_logged_in'):
+        emit('error', {'message': 'Admin login required'})
+        return
+
+    if not isinstance(data, dict):
+        emit('error', {'message': 'Invalid broadcast'})
+        return
+
     message = data.get('message', '')
-    target = data.get('target', 'all_users')  # 'all_users', 'type_its', 'type_majlis'
+    target = data.get('target', 'all_users')
+    if target not in BROADCAST_TARGETS:
+        emit('error', {'message': 'Invalid broadcast target'})
+        return
 
     if message:
-        socketio.emit('admin_message', {
-            'message': message,
-            'timestamp': datetime.now().isoformat()
-        }, room=target)
-        print(f"WebSocket: Admin broadcast to {target}: {message}")
+        broadcast_id = queue_admin_broadcast(message, target)
+        print(f"WebSocket: Queued admin broadcast {broadcast_id} to {target}: {message}")
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+def _wait_for_health(url, deadline):
+    """Poll a worker's /health until it answers 200 or the deadline passes"""
+    import requests
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{url}/health', timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def _start_private_redis(port):
+    """Start a throwaway Redis on a local port; returns (url, stop function).
+
+    Uses redis-server when it is installed, otherwise fakeredis's TCP server.
+    """
+    import shutil
+    import subprocess
+    url = f'redis://127.0.0.1:{port}/0'
+    if shutil.which('redis-server'):
+        process = subprocess.Popen(['redis-server', '--port', str(port), '--bind', '127.0.0.1',
+                                    '--save', '', '--appendonly', 'no'], stdout=subprocess.DEVNULL)
+        def stop():
+            process.terminate()
+            process.wait(10)
+    else:
+        try:
+            from fakeredis import TcpFakeServer
+        except ImportError:
+            raise click.ClickException('A private Redis needs redis-server on PATH or the fakeredis package')
+        server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        def stop():
+            server.shutdown()
+            server.server_close()
+    
+    client = redis.Redis.from_url(url, decode_responses=True)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            client.ping()
+            return url, stop
+        except redis.ConnectionError:
+            if time.monotonic() > deadline:
+                stop()
+                raise click.ClickException(f'Private Redis on port {port} did not start')
+            time.sleep(0.2)
+
+@app.cli.command('check-multiworker')
+@click.option('--workers', default=2, show_default=True, help='Worker processes to start')
+@click.option('--clients', default=2, show_default=True, help='Socket.IO clients per worker')
+@click.option('--base-port', default=5100, show_default=True, help='Port of the first worker; the others follow it')
+@click.option('--redis-port', default=6390, show_default=True, help='Port of the private Redis started for the run')
+@click.option('--timeout', default=30, show_default=True, help='Seconds to wait for workers and for deliveries')
+def check_multiworker_command(workers, clients, base_port, redis_port, timeout):
+    """Check that room emits and admin broadcasts reach clients on every worker.
+
+    Starts a private Redis (never the configured REDIS_URL) and WORKERS
+    eventlet server processes sharing it as their cache and Socket.IO
+    message queue. Each client logs in with a throwaway ITS ID and connects
+    to a different worker; a test-only event and an admin broadcast are then
+    sent to each client's own room. Refuses to run unless DATABASE_URL is a
+    local database; the throwaway IDs are deleted from it afterwards.
+    """
+    import subprocess
+    import sys
+    import requests
+    from urllib.parse import urlparse
+    from socketio import Client as SocketIOClient, RedisManager
+    
+    # No hostname means SQLite or a local Unix socket
+    if urlparse(DATABASE_URL).hostname not in (None,) + LOCAL_HOSTS:
+        raise click.ClickException('DATABASE_URL must point at a local database for this check')
+    
+    # One ID per client: a second login with the same ID is refused
+    its_ids = []
+    while len(its_ids) < workers * clients:
+        candidate = str(10000000 + secrets.randbelow(90000000))
+        if candidate not in its_ids and not ItsID.query.get(candidate):
+            its_ids.append(candidate)
+    
+    urls = [f'http://127.0.0.1:{base_port + i}' for i in range(workers)]
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    redis_url, stop_redis = _start_private_redis(redis_port)
+    private_redis = redis.Redis.from_url(redis_url, decode_responses=True)
+    worker_env = dict(os.environ, REDIS_URL=redis_url, SOCKETIO_MESSAGE_QUEUE=redis_url)
+    processes = []
+    connections = []
+    received = {}
+    try:
+        # Database only: the workers load the private Redis from it on startup
+        db.session.add_all([ItsID(id=its_id) for its_id in its_ids])
+        db.session.commit()
+        
+        for port in range(base_port, base_port + workers):
+            # Patched like a gunicorn eventlet worker, then served by eventlet directly
+            processes.append(subprocess.Popen(
+                [sys.executable, '-c', 'import eventlet; eventlet.monkey_patch(); import app; app.start_background_tasks(); '
+                 f'app.socketio.run(app.app, host="127.0.0.1", port={port}, log_output=False)'],
+                cwd=app_dir, env=worker_env))
+        
+        deadline = time.monotonic() + timeout
+        for url in urls:
+            if not _wait_for_health(url, deadline):
+                raise click.ClickException(f'Worker at {url} did not become healthy')
+        
+        for index, its_id in enumerate(its_ids):
+            url = urls[index % workers]
+            http = requests.Session()
+            http.post(f'{url}/', data={'its_id': its_id}, allow_redirects=False, timeout=10)
+            session_token = http.cookies.get('session_token')
+            if not session_token:
+                raise click.ClickException(f'Login of test ID {its_id} on {url} failed')
+            
+            events = {name: threading.Event() for name in ('connection_established', 'multiworker_check', 'admin_message')}
+            received[its_id] = (url, events)
+            client = SocketIOClient()
+            for name, event in events.items():
+                client.on(name, lambda data, event=event: event.set())
+            # Each client talks to one worker directly, so long-polling needs no affinity
+            client.connect(url, headers={'Cookie': f'session_token={session_token}'},
+                           transports=['polling'], wait_timeout=10)
+            connections.append((client, url))
+        
+        deadline = time.monotonic() + timeout
+        for url, events in received.values():
+            if not events['connection_established'].wait(max(deadline - time.monotonic(), 0)):
+                raise click.ClickException(f'A client on {url} was not admitted to its rooms')
+        
+        # Sent from this process into each test user's own room, so every
+        # delivery crosses the message queue and no other socket can get it
+        emitter = RedisManager(redis_url, channel='webinar-relay-socketio', write_only=True)
+        for its_id in its_ids:
+            room = f'user_{its_id}_its'
+            emitter.emit('multiworker_check', {'its_id': its_id}, room=room, namespace='/')
+            queue_admin_broadcast('Multi-worker delivery check', room, client=private_redis)
+        
+        deadline = time.monotonic() + timeout
+        for url, events in received.values():
+            for name in ('multiworker_check', 'admin_message'):
+                events[name].wait(max(deadline - time.monotonic(), 0))
+        
+        missing = 0
+        for url in urls:
+            for name in ('multiworker_check', 'admin_message'):
+                got = sum(1 for client_url, events in received.values() if client_url == url and events[name].is_set())
+                missing += clients - got
+                print(f"{url} {name}: {got}/{clients} clients")
+        if missing:
+            raise click.ClickException(f'{missing} deliveries missing')
+        print(f"All {len(its_ids)} clients on {workers} workers received the room emit and the broadcast")
+    finally:
+        for client, url in connections:
+            try:
+                client.disconnect()
+            except Exception as e:
+                print(f"Error closing test client on {url}: {e}")
+        for process in processes:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        try:
+            db.session.rollback()
+            ItsID.query.filter(ItsID.id.in_(its_ids)).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error deleting test IDs: {e}")
+        stop_redis()
 
 @socketio.on('request_stats')
 def handle_stats_request():
     """Handle real-time stats request from admin"""
     try:
-        # Get active sessions from Redis
-        its_sessions = 0
-        majlis_sessions = 0
-
-        for key in redis_client.scan_iter("sessions:*"):
-            session_data = redis_client.get(key)
-            if session_data:
-                session_info = json.loads(session_data)
-                if session_info.get('user_type') == 'its':
-                    its_sessions += 1
-                elif session_info.get('user_type') == 'majlis':
-                    majlis_sessions += 1
+        # Read the maintained live session counters
+        counts = get_active_session_counts()
+        its_sessions = counts['its']
+        majlis_sessions = counts['majlis']
 
         emit('stats_update', {
             'its_active': its_sessions,
@@ -6399,77 +8621,217 @@ def broadcast_to_type(user_type, event, data):
     """Broadcast event to all users of a specific type (its/majlis)"""
     socketio.emit(event, data, room=f"type_{user_type}")
 
-# Background task to check for inactive users and force logout after 1 hour
-def check_inactive_users():
-    """
-    Background task that runs every 5 minutes to check for inactive users.
-    Force logout users who have been inactive (no WebSocket activity) for more than 1 hour.
+# Background task to check for inactive users and force logout after inactivity
+INACTIVE_CHECK_INTERVAL = int(os.environ.get('INACTIVE_CHECK_INTERVAL', '300'))  # seconds
+INACTIVE_THRESHOLD = timedelta(minutes=int(os.environ.get('INACTIVE_THRESHOLD_MINUTES', '60')))
+INACTIVE_SWEEP_BATCH = int(os.environ.get('INACTIVE_SWEEP_BATCH', '500'))
+
+# KEYS: activity set; ARGV: member, score seen by the sweeper
+# Only drops the member if it was not refreshed in the meantime.
+REMOVE_STALE_ACTIVITY_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score and tonumber(score) <= tonumber(ARGV[2]) then
+    return redis.call('ZREM', KEYS[1], ARGV[1])
+end
+return 0
+"""
+remove_stale_activity_script = redis_client.register_script(REMOVE_STALE_ACTIVITY_SCRIPT)
+
+def _describe_duration(duration):
+    """Human-readable duration for user-facing messages, e.g. '1 hour' or '90 minutes'"""
+    minutes = int(duration.total_seconds() // 60)
+    if minutes % 60 == 0:
+        hours = minutes // 60
+        return f"{hours} hour{'s' if hours != 1 else ''}"
+    return f"{minutes} minutes"
+
+def logout_inactive_users(keep_lease=None):
+    """Force logout users whose last activity is older than INACTIVE_THRESHOLD.
+
+    Only activity entries below the cutoff are read (ZRANGEBYSCORE), so the
+    cost is proportional to the number of users being logged out. keep_lease,
+    if given, is called before each batch and stops the sweep once it fails.
     """
+    cutoff = time.time() - INACTIVE_THRESHOLD.total_seconds()
+    inactive_count = 0
+    
     while True:
-        try:
-            print("Checking for inactive users...")
-            current_time = datetime.now()
-            inactive_threshold = timedelta(hours=1)
-
-            # Get all active sessions from Redis
-            inactive_count = 0
-            for key in redis_client.scan_iter("sessions:*"):
-                session_data = redis_client.get(key)
-                if session_data:
-                    session_info = json.loads(session_data)
-                    user_id = session_info.get('user_id')
-                    user_type = session_info.get('user_type')
-
-                    if user_id and user_type:
-                        # Get last activity timestamp
-                        last_activity = get_user_last_activity(user_id, user_type)
-
-                        if last_activity:
-                            # Calculate time since last activity
-                            time_inactive = current_time - last_activity
-
-                            if time_inactive > inactive_threshold:
-                                # User has been inactive for more than 1 hour - force logout
-                                session_token = key.replace('sessions:', '')
-
-                                print(f"Force logout: User {user_id} ({user_type}) - Inactive for {time_inactive}")
-
-                                # Delete the session from Redis
-                                logout_session(session_token)
-
-                                # Send force logout notification via WebSocket
-                                socketio.emit('force_logout', {
-                                    'message': 'You have been logged out due to inactivity for more than 1 hour. Please login again.',
-                                    'reason': 'inactivity',
-                                    'inactive_duration': str(time_inactive)
-                                }, room=f"user_{user_id}_{user_type}")
-
-                                # Clean up activity tracking
-                                redis_client.delete(f"activity:{user_id}:{user_type}")
-
-                                inactive_count += 1
-                        else:
-                            # No activity record found - user might have just logged in
-                            # Set initial activity timestamp
-                            update_user_activity(user_id, user_type)
-
-            if inactive_count > 0:
-                print(f"Forced logout {inactive_count} inactive user(s)")
+        if keep_lease and not keep_lease():
+            print("Inactivity sweep stopped: sweeper lease lost")
+            break
+        stale_members = redis_client.zrangebyscore(USER_ACTIVITY_KEY, '-inf', cutoff,
+                                                   start=0, num=INACTIVE_SWEEP_BATCH, withscores=True)
+        for member, last_activity in stale_members:
+            user_type, user_id = member.split(':', 1)
+            time_inactive = timedelta(seconds=int(time.time() - last_activity))
+            
+            if get_user_session_tokens(user_id, user_type):
+                print(f"Force logout: User {user_id} ({user_type}) - Inactive for {time_inactive}")
+                
+                # Delete the user's sessions from Redis
+                remove_existing_user_sessions(user_id, user_type)
+                
+                # Send force logout notification via WebSocket
+                socketio.emit('force_logout', {
+                    'message': f'You have been logged out due to inactivity for more than {_describe_duration(INACTIVE_THRESHOLD)}. Please login again.',
+                    'reason': 'inactivity',
+                    'inactive_duration': str(time_inactive)
+                }, room=f"user_{user_id}_{user_type}")
+                
+                inactive_count += 1
+            
+            # Clean up activity tracking
+            remove_stale_activity_script(keys=[USER_ACTIVITY_KEY], args=[member, last_activity])
+        
+        if len(stale_members) < INACTIVE_SWEEP_BATCH:
+            break
+    
+    return inactive_count
+
+def check_inactive_users(keep_lease=None):
+    """Force logout users who have been inactive (no WebSocket activity) for longer than the threshold"""
+    try:
+        print("Checking for inactive users...")
+        inactive_count = logout_inactive_users(keep_lease)
+
+        if inactive_count > 0:
+            print(f"Forced logout {inactive_count} inactive user(s)")
+        return inactive_count
+    except Exception as e:
+        print(f"Error in check_inactive_users: {e}")
+        return 0
+
+# Leader election so only one process/replica runs the background sweeper
+SWEEPER_LEADER_KEY = 'leader:background_sweeper'
+SWEEPER_LEASE_SECONDS = int(os.environ.get('SWEEPER_LEASE_SECONDS', '30'))
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+# KEYS: leader key; ARGV: instance id, lease in milliseconds
+RENEW_LEADERSHIP_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+renew_leadership_script = redis_client.register_script(RENEW_LEADERSHIP_SCRIPT)
+
+# KEYS: leader key; ARGV: instance id
+RELEASE_LEADERSHIP_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+release_leadership_script = redis_client.register_script(RELEASE_LEADERSHIP_SCRIPT)
+
+background_stop = threading.Event()
+
+def acquire_or_renew_leadership(is_leader):
+    """Take the sweeper lease if it is free, or extend it if we hold it"""
+    lease_ms = SWEEPER_LEASE_SECONDS * 1000
+    if is_leader:
+        return bool(renew_leadership_script(keys=[SWEEPER_LEADER_KEY], args=[INSTANCE_ID, lease_ms]))
+    return bool(redis_client.set(SWEEPER_LEADER_KEY, INSTANCE_ID, nx=True, px=lease_ms))
+
+sweeper_lease = {'renewed_at': 0}
+
+def renew_sweeper_lease():
+    """Keep the lease through a long sweep; False once another instance holds it.
 
+    Called between batches, but only goes to Redis once a third of the
+    lease has passed since the last renewal.
+    """
+    if time.monotonic() - sweeper_lease['renewed_at'] < SWEEPER_LEASE_SECONDS / 3:
+        return True
+    if not acquire_or_renew_leadership(True):
+        return False
+    sweeper_lease['renewed_at'] = time.monotonic()
+    return True
+
+def run_background_sweeper():
+    """
+    Background task run by every process, but only the instance holding the
+    Redis leader lease does the work: the inactivity sweep every
+    INACTIVE_CHECK_INTERVAL seconds plus live session counter maintenance.
+    The lease is renewed every third of SWEEPER_LEASE_SECONDS, between
+    iterations and between batches of a long sweep, so a crashed leader is
+    replaced within one lease period and a slow sweep never overlaps another.
+    """
+    is_leader = False
+    next_inactive_check = next_counter_sweep = next_reconcile = 0
+    
+    while not background_stop.is_set():
+        try:
+            was_leader = is_leader
+            is_leader = acquire_or_renew_leadership(is_leader)
+            if is_leader:
+                sweeper_lease['renewed_at'] = time.monotonic()
+            if is_leader != was_leader:
+                print(f"Background sweeper: {'acquired' if is_leader else 'lost'} leadership ({INSTANCE_ID})")
+            
+            if is_leader:
+                now = time.monotonic()
+                if now >= next_reconcile:
+                    if reconcile_session_counters(renew_sweeper_lease) is not None:
+                        next_reconcile = now + SESSION_RECONCILE_INTERVAL
+                elif now >= next_counter_sweep:
+                    expire_session_counters()
+                    next_counter_sweep = now + SESSION_EXPIRY_SWEEP_INTERVAL
+                
+                if now >= next_inactive_check:
+                    check_inactive_users(renew_sweeper_lease)
+                    next_inactive_check = now + INACTIVE_CHECK_INTERVAL
+        except Exception as e:
+            print(f"Error in background sweeper: {e}")
+            is_leader = False
+        
+        background_stop.wait(SWEEPER_LEASE_SECONDS / 3)
+    
+    if is_leader:
+        try:
+            release_leadership_script(keys=[SWEEPER_LEADER_KEY], args=[INSTANCE_ID])
+            print("Background sweeper: released leadership")
         except Exception as e:
-            print(f"Error in check_inactive_users: {e}")
+            print(f"Error releasing sweeper leadership: {e}")
 
-        # Sleep for 5 minutes before next check
-        import time
-        time.sleep(300)  # 300 seconds = 5 minutes
+background_threads = {}
 
-# Start the background task in a separate thread
-import threading
-inactive_checker_thread = threading.Thread(target=check_inactive_users, daemon=True)
-inactive_checker_thread.start()
-print("Started background task: Inactive user checker (checks every 5 minutes)")
+def stop_background_tasks():
+    """Stop the sweeper and hand the leader lease over on shutdown"""
+    background_stop.set()
+    sweeper = background_threads.get('sweeper')
+    if sweeper and sweeper.is_alive():
+        sweeper.join(timeout=5)
+
+def start_background_tasks():
+    """Start the background threads of a serving process.
+
+    Called from the server entry points only (gunicorn's post_worker_init
+    hook in gunicorn.conf.py, and __main__), so importing the app for a CLI
+    command neither initializes the database nor joins the sweeper election.
+    """
+    if background_threads:
+        return
+    
+    background_threads['startup'] = threading.Thread(target=run_startup_tasks, daemon=True)
+    background_threads['startup'].start()
+    print("Started background task: Database check and cache warm-up")
+    
+    background_threads['sweeper'] = threading.Thread(target=run_background_sweeper, daemon=True)
+    background_threads['sweeper'].start()
+    atexit.register(stop_background_tasks)
+    print(f"Started background task: Leader-elected sweeper (inactive check every {INACTIVE_CHECK_INTERVAL}s)")
+    
+    background_threads['worker_messages'] = threading.Thread(target=listen_for_worker_messages, daemon=True)
+    background_threads['worker_messages'].start()
+    print("Started background task: Worker message listener (session invalidation, broadcasts)")
+    
+    for _ in range(BROADCAST_CONCURRENCY):
+        threading.Thread(target=run_broadcast_worker, daemon=True).start()
+    print(f"Started background task: {BROADCAST_CONCURRENCY} broadcast fan-out worker(s)")
 
 # Only use Flask dev server for local development
 # In production (Railway), Gunicorn from Procfile will be used instead
 if __name__ == '__main__':
+    start_background_tasks()
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
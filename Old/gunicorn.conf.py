@@ -0,0 +1,11 @@
+# Gunicorn settings shared by the Procfile, railway.toml and the Dockerfile
+
+def post_worker_init(worker):
+    """Start the app's background threads once the worker has loaded it.
+
+    Runs after the eventlet worker has monkey-patched and imported the app,
+    so the threads are green threads of the serving process. CLI commands
+    import the app without starting them.
+    """
+    from app import start_background_tasks
+    start_background_tasks()